@@ -125,81 +125,94 @@
 import pandas as pd
 import streamlit as st
 import asyncio
-from huggingface_hub import InferenceClient
 # import os
 # from dotenv import load_dotenv
-import re
+from Dataset_Export import export_download_buttons
+from Schema_Inference import infer_schema
+import time
+from Llama_Inference import (
+    MAX_CONCURRENT_REQUESTS, RECORDS_PER_REQUEST, LiveTable, cache_stats, get_incident_pool,
+    request_incident_batch, top_up_max_tokens, within_top_up_budget,
+)
 
 # load_dotenv()
 
-# Load API keys
-HF_API_KEY = st.secrets["HF_API_KEY"]
+# The Hugging Face client is created on first use by get_inference_client(), so this module imports without secrets
 
-# Initialize Hugging Face client
-client = InferenceClient(api_key=HF_API_KEY)
+async def generate_incident_data_with_llama(num_records, use_cache=True, on_incident=None, report=None, inference_client=None):
+    """Generate incident types along with Impact and Likelihood scores using the LLaMA model.
 
-def infer_schema(file):
-    """Infer schema of the uploaded CSV file."""
-    df = pd.read_csv(file)
-    schema = [{"Column Name": column, "Data Type": str(df[column].dtype)} for column in df.columns]
-    return schema, df
+    on_incident, if given, is called with each new unique incident as soon as it is parsed.
+    Fewer than num_records incidents are returned if the top-up budget runs out first; report,
+    if a dict, receives the rounds, requests, tokens spent and tokens per accepted record.
+    inference_client replaces the Hugging Face client, e.g. with Fake_Inference.FakeInferenceClient.
+    """
+    started = time.monotonic()
+    usage = {"requests": 0, "completion_tokens": 0}
+    rounds = 0
+
+    # Merge the sub-batches as they stream in, keeping the first occurrence of each incident type
+    incident_data = []
+    seen_types = set()
+
+    def accept(incident):
+        if incident[0].casefold() in seen_types:
+            return
+        seen_types.add(incident[0].casefold())
+        incident_data.append(incident)
+        if on_incident and len(incident_data) <= num_records:
+            on_incident(incident)
 
-async def generate_incident_data_with_llama(num_records):
-    """Generate incident types along with Impact and Likelihood scores using the LLaMA model."""
     try:
-        messages = [{
-            "role": "user",
-            "content": f"""Generate unique medically relevant incident types 1.5 times more than the records provided as input {num_records}, ensuring each incident type is unique and concise (limited to 2-3 words). The generated incident types should be directly related to medical scenarios, such as 'Pressure Ulcer', 'Equipment Failure', 'Infection Control', etc.
-                    
-            The output should:
-            1. Contain only unique values with no duplicates.
-            2. It should only contain incident type. No other text should be generated apart from incident type.
-            3. Be formatted with one incident type per line.
-            4. Include only meaningful and realistic medical terms.
-            5. Please don't keep any values null.
-            6. Srictly make sure that you do not add any numbers in the incident type column while generating the response. If it gets generated just remove them and only get the incident type details.
-                    
-            Additionally, for each incident type, assign an Impact score and a Likelihood score.Impact and Likelihood should be integers between 1 and 10, where 1 represents the lowest severity or probability and 6 represents the highest severity or probability.
-            
-            The output should be formatted as follows:
-            Incident Type: Impact, Likelihood
-            
-            Example:
-            Pressure Ulcer: 4, 5
-            Equipment Failure: 5, 3
-            
-            
-            
-            """
-        }]
-
-        response = await asyncio.to_thread(
-            client.chat.completions.create,
-            model="meta-llama/Llama-3.3-70B-Instruct",
-            messages=messages,
-            max_tokens=2000
-        )
-        
-        lines = response["choices"][0]["message"]["content"].strip().split("\n")
-        incident_data = []
-
-        for line in lines:
-            match = re.match(r"^([^\d:]+):\s*(\d),\s*(\d)$", line)
-            if match:
-                incident_type, impact, likelihood = match.groups()
-                incident_type = incident_type.strip()
-                if incident_type and impact.isdigit() and likelihood.isdigit():
-                    incident_data.append((incident_type, int(impact), int(likelihood)))
-        
-        if len(incident_data) < num_records:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        while len(incident_data) < num_records and (
+            rounds == 0 or within_top_up_budget(usage, num_records, top_up_started, first_round_tokens)
+        ):
+            # Ask only for the shortfall, split into sub-batches that fit the token limit and run in parallel;
+            # follow-up rounds list the types we already have and size max_tokens to the shortfall
             missing_count = num_records - len(incident_data)
-            existing_samples = incident_data.copy()
-            while len(incident_data) < num_records:
-                random_sample = existing_samples[len(incident_data) % len(existing_samples)]
-                incident_data.append(random_sample)
+            batch_sizes = [min(RECORDS_PER_REQUEST, missing_count - start) for start in range(0, missing_count, RECORDS_PER_REQUEST)]
+            exclude = [incident[0] for incident in incident_data] if rounds else None
+            accepted_before = len(incident_data)
+            await asyncio.gather(
+                *(
+                    request_incident_batch(
+                        size,
+                        index if len(batch_sizes) > 1 else None,
+                        semaphore,
+                        accept,
+                        use_cache,
+                        exclude=exclude,
+                        max_tokens=top_up_max_tokens(size) if rounds else 2000,
+                        usage=usage,
+                        inference_client=inference_client
+                    )
+                    for index, size in enumerate(batch_sizes)
+                ),
+                return_exceptions=True
+            )
+            rounds += 1
+            if rounds == 1:
+                top_up_started, first_round_tokens = time.monotonic(), usage["completion_tokens"]
+            if len(incident_data) == accepted_before:
+                break  # The model has stopped producing new incident types
+
+        if not incident_data:
+            raise RuntimeError("The model returned no valid incident lines.")
         return incident_data[:num_records]
     except Exception as e:
         return [("Error: AI generation failed", 3, 3)] * num_records
+    finally:
+        if report is not None:
+            accepted = min(len(incident_data), num_records)
+            report.update(
+                rounds=rounds,
+                requests=usage["requests"],
+                completion_tokens=usage["completion_tokens"],
+                accepted=accepted,
+                tokens_per_record=usage["completion_tokens"] / accepted if accepted else 0.0,
+                seconds=time.monotonic() - started,
+            )
 
 def main():
     st.title("Risk Score Tool Generator")
@@ -208,18 +221,48 @@ def main():
     st.sidebar.header("Settings")
     uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type="csv")
     num_records = st.sidebar.number_input("Enter the number of records to generate:", min_value=1, step=1, value=10)
+    use_cache = st.sidebar.checkbox("Reuse cached AI responses", value=True)
+    # Pooled incidents are earlier AI responses too, so fresh responses skip the pool
+    use_pool = st.sidebar.checkbox(
+        "Sample from the pre-warmed incident pool", value=True, disabled=not use_cache,
+        help="Unavailable when cached AI responses are not reused.",
+    ) and use_cache
     generate_button = st.sidebar.button("Generate Data")
+
+    # Keep the pool topped up in the background so generation can sample locally
+    incident_pool = get_incident_pool()
+    incident_pool.ensure_refill()
     
     if uploaded_file is not None:
         try:
             schema, df = infer_schema(uploaded_file)
 
             if generate_button:
-                with st.spinner("Generating Incident Data..."):
-                    incident_data = asyncio.run(generate_incident_data_with_llama(num_records))
+                incident_data = incident_pool.sample(num_records) if use_pool else None
+                if incident_data is None:
+                    with st.spinner("Generating Incident Data..."):
+                        # Show incidents as they stream in, then replace them with the full table
+                        live_table = LiveTable(["Incident Type", "Impact", "Likelihood"])
+                        report = {}
+                        incident_data = asyncio.run(generate_incident_data_with_llama(num_records, use_cache, live_table.add, report))
+                        live_table.clear()
+                    incident_pool.add(live_table.rows)
+                    st.sidebar.caption(f"AI cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+                    st.sidebar.caption(
+                        f"{report['requests']} requests in {report['rounds']} rounds, "
+                        f"{report['tokens_per_record']:.1f} tokens per accepted record"
+                    )
+                st.sidebar.caption(
+                    f"Incident pool: {incident_pool.size()} types"
+                    + (" (refilling in the background)" if incident_pool.is_refilling() else "")
+                )
+                if incident_pool.last_error is not None:
+                    st.sidebar.caption(f"Last pool refill failed: {incident_pool.last_error}")
+                if len(incident_data) < num_records:
+                    st.warning(f"Only {len(incident_data)} unique incident types were generated within the budget.")
                 
                 generated_data = pd.DataFrame({
-                    "Incident ID": range(1, num_records + 1),
+                    "Incident ID": range(1, len(incident_data) + 1),
                     "Incident Type": [item[0] for item in incident_data],
                     "Impact": [item[1] for item in incident_data],
                     "Likelihood": [item[2] for item in incident_data],
@@ -230,13 +273,7 @@ def main():
                 st.write("### Generated Risk Score Data:")
                 st.write(generated_data)
 
-                csv = generated_data.to_csv(index=False).encode("utf-8")
-                st.download_button(
-                    label="Download Risk Score Data as CSV",
-                    data=csv,
-                    file_name="Risk_Score.csv",
-                    mime="text/csv",
-                )
+                export_download_buttons(generated_data, "Download Risk Score Data", "Risk_Score")
         except Exception as e:
             st.error(f"An error occurred: {e}")
     else:
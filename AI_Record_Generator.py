@@ -1,35 +1,35 @@
-import pandas as pd
 import streamlit as st
-import random
 import asyncio
-from huggingface_hub import InferenceClient
+from Dataset_Export import export_download_buttons
+from Schema_Inference import infer_schema
+from Supabase_Loader import load_with_progress
+from Incident_Numbers import reserve_incident_numbers
+from Record_Synthesis import generate_random_data, synthesize_column  # Re-exported: they used to live here
+import time
+from Llama_Inference import (
+    MODEL, LiveTable, cache_stats, exclusion_note, get_incident_pool, get_inference_client, parse_incident_type,
+    stream_completion_lines, top_up_max_tokens, within_top_up_budget,
+)
 # import os
 # from dotenv import load_dotenv
 
 # load_dotenv()
 
-# Load API keys
-HF_API_KEY = st.secrets["HF_API_KEY"]
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-
-
-# Initialize Hugging Face client
-client = InferenceClient(api_key=HF_API_KEY)
-
-def infer_schema(file):
-    """Infer schema of the uploaded CSV file."""
-    df = pd.read_csv(file)
-    schema = []
-
-    for column in df.columns:
-        col_type = df[column].dtype
-        schema.append({"Column Name": column, "Data Type": str(col_type)})
-
-    return schema, df
-
-async def generate_incident_types_with_llama(num_records):
-    """Generate unique medical incident types using the LLaMA model."""
+# The Hugging Face client is created on first use by get_inference_client(), so this module imports without secrets
+
+async def generate_incident_types_with_llama(num_records, use_cache=True, on_incident_type=None, report=None, inference_client=None):
+    """Generate unique medical incident types using the LLaMA model.
+
+    on_incident_type, if given, is called with each incident type as soon as its line is complete.
+    Fewer than num_records types are returned if the top-up budget runs out first; report, if a
+    dict, receives the rounds, requests, tokens spent and tokens per accepted record.
+    inference_client replaces the Hugging Face client, e.g. with Fake_Inference.FakeInferenceClient.
+    """
+    started = time.monotonic()
+    usage = {"requests": 0, "completion_tokens": 0}
+    rounds = 0
+    incident_types = []
+    seen_types = set()
     try:
         messages = [
             {
@@ -49,47 +49,62 @@ async def generate_incident_types_with_llama(num_records):
             }
         ]
 
-        response = await asyncio.to_thread(
-            client.chat.completions.create,
-            model="meta-llama/Llama-3.3-70B-Instruct",
-            messages=messages,
-            max_tokens=500
-        )
-
-        incident_types = response["choices"][0]["message"]["content"].strip().split("\n")
-        # Ensure enough records are generated
-        while len(incident_types) < num_records:
-            incident_types.extend(incident_types)  # Extend the list if not enough types are generated
-        return [incident.strip() for incident in incident_types][:num_records]  # Trim to exact count
+        loop = asyncio.get_running_loop()
+
+        def consume_stream(request_messages, max_tokens):
+            for line in stream_completion_lines(
+                inference_client or get_inference_client(),
+                model=MODEL,
+                messages=request_messages,
+                max_tokens=max_tokens,
+                use_cache=use_cache,
+                usage=usage
+            ):
+                # Only well-formed types count towards num_records (preambles and the like don't)
+                incident_type = parse_incident_type(line)
+                if incident_type is None or incident_type.casefold() in seen_types:
+                    continue
+                seen_types.add(incident_type.casefold())
+                incident_types.append(incident_type)
+                if on_incident_type and len(incident_types) <= num_records:
+                    loop.call_soon_threadsafe(on_incident_type, [incident_type])
+
+        await asyncio.to_thread(consume_stream, messages, 500)
+        rounds = 1
+        top_up_started, first_round_tokens = time.monotonic(), usage["completion_tokens"]
+
+        # Top up: ask only for the missing types, sized to the shortfall, excluding the ones we have
+        while len(incident_types) < num_records and within_top_up_budget(usage, num_records, top_up_started, first_round_tokens):
+            missing_count = num_records - len(incident_types)
+            follow_up = [{
+                "role": "user",
+                "content": messages[0]["content"]
+                + f"\nProvide exactly {missing_count} incident types.\n"
+                + exclusion_note(incident_types),
+            }]
+            accepted_before = len(incident_types)
+            await asyncio.to_thread(consume_stream, follow_up, top_up_max_tokens(missing_count))
+            rounds += 1
+            if len(incident_types) == accepted_before:
+                break  # The model has stopped producing new incident types
+
+        if not incident_types:
+            raise RuntimeError("The model returned no incident types.")
+        return incident_types[:num_records]
 
     except Exception as e:
         return [f"Error: {e}"] * num_records
-
-def generate_random_data(df, num_records):
-    """Generate random data based on the inferred schema."""
-    random_data = pd.DataFrame()
-
-    for column in df.columns:
-        column_cleaned = column.strip().lower()
-        if column_cleaned == "incident_id":
-            random_data[column] = range(1, num_records + 1)  # Sequential unique values starting from 1
-        elif column_cleaned == "likelihood":
-            random_data[column] = [random.randint(1, 6) for _ in range(num_records)]  # Random integers between 1 and 6
-        elif column_cleaned == "impact":
-            random_data[column] = [random.randint(1, 6) for _ in range(num_records)]  # Random integers between 1 and 6
-        else:
-            random_data[column] = [None] * num_records  # Placeholder for other columns
-
-    # Add Risk_Score column as product of Impact and Likelihood
-    if "impact" in [col.strip().lower() for col in df.columns] and "likelihood" in [col.strip().lower() for col in df.columns]:
-        random_data["Risk Score"] = (
-            random_data[[col for col in df.columns if col.strip().lower() == "impact"][0]]
-            * random_data[[col for col in df.columns if col.strip().lower() == "likelihood"][0]]
-        )
-    else:
-        random_data["Risk Score"] = None  # Placeholder if columns are not available
-
-    return random_data
+    finally:
+        if report is not None:
+            accepted = min(len(incident_types), num_records)
+            report.update(
+                rounds=rounds,
+                requests=usage["requests"],
+                completion_tokens=usage["completion_tokens"],
+                accepted=accepted,
+                tokens_per_record=usage["completion_tokens"] / accepted if accepted else 0.0,
+                seconds=time.monotonic() - started,
+            )
 
 # def main():
 #     st.title("Risk Score Tool Generator")
@@ -152,31 +167,62 @@ def main():
             num_records = st.number_input(
                 "Enter the number of records to generate:", min_value=1, step=1
             )
+            load_to_supabase = st.checkbox("Load into Supabase (Risk_Heatmap)", value=False)
+            use_cache = st.checkbox("Reuse cached AI responses", value=True)
+            # Pooled incidents are earlier AI responses too, so fresh responses skip the pool
+            use_pool = st.checkbox(
+                "Sample from the pre-warmed incident pool", value=True, disabled=not use_cache,
+                help="Unavailable when cached AI responses are not reused.",
+            ) and use_cache
+
+            # Keep the shared pool topped up in the background so generation can sample locally
+            incident_pool = get_incident_pool()
+            incident_pool.ensure_refill()
 
             if st.button("Generate Data"):
                 # Convert num_records to integer
                 num_records = int(num_records)
 
-                # Generate random data
-                random_data = generate_random_data(df, num_records)
-
-                # Generate Incident Types using LLaMA model
-                with st.spinner("Generating data for Risk Score dataset..."):
-                    incident_types = asyncio.run(generate_incident_types_with_llama(num_records))
+                # Generate random data, with incident IDs no earlier run has used (they key the upsert)
+                random_data = generate_random_data(df, num_records, schema, allocator=reserve_incident_numbers(num_records))
+
+                # Sample Incident Types from the pool, or generate them with the LLaMA model if it is too small
+                pooled = incident_pool.sample(num_records) if use_pool else None
+                if pooled is not None:
+                    incident_types = [incident[0] for incident in pooled]
+                else:
+                    with st.spinner("Generating data for Risk Score dataset..."):
+                        # Show incident types as they stream in, then replace them with the full table
+                        live_table = LiveTable(["Incident Type"])
+                        report = {}
+                        incident_types = asyncio.run(generate_incident_types_with_llama(num_records, use_cache, live_table.add, report))
+                        live_table.clear()
+                    st.caption(
+                        f"AI cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses; "
+                        f"{report['requests']} requests in {report['rounds']} rounds, "
+                        f"{report['tokens_per_record']:.1f} tokens per accepted record"
+                    )
+                st.caption(
+                    f"Incident pool: {incident_pool.size()} types"
+                    + (" (refilling in the background)" if incident_pool.is_refilling() else "")
+                )
+                if incident_pool.last_error is not None:
+                    st.caption(f"Last pool refill failed: {incident_pool.last_error}")
+                if len(incident_types) < num_records:
+                    st.warning(f"Only {len(incident_types)} unique incident types were generated within the budget.")
 
-                random_data["Incident Type"] = incident_types
+                # Rows without a generated type are left empty rather than repeating earlier types
+                random_data["Incident Type"] = incident_types + [None] * (num_records - len(incident_types))
 
                 st.write("### Random Data Generated:")
                 st.write(random_data)
 
+                # Upsert the generated rows into the table the dashboard reads
+                if load_to_supabase:
+                    load_with_progress(random_data, "Risk_Heatmap")
+
                 # Allow downloading of the generated data
-                csv = random_data.to_csv(index=False).encode("utf-8")
-                st.download_button(
-                    label="Download Risk Score Data as CSV",
-                    data=csv,
-                    file_name="Risk_Score.csv",
-                    mime="text/csv",
-                )
+                export_download_buttons(random_data, "Download Risk Score Data", "Risk_Score")
 
         except Exception as e:
             st.error(f"An error occurred: {e}")
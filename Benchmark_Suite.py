@@ -0,0 +1,244 @@
+import argparse
+import ctypes
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from streamlit import config
+from streamlit.logger import set_log_level
+import Categorize_Riskscore as riskscore
+from Dataset_Export import write_csv
+from Incident_Dataset_Generator import IncidentLoadProfile, generate_incident_data, generate_incident_frame
+from Incident_Numbers import IncidentNumberAllocator
+from Record_Synthesis import generate_random_data
+from Risk_Categories import categorize_impacts, categorize_likelihoods, categorize_risk_scores
+from Schema_Inference import describe_sample
+
+# Row counts every case runs at
+BENCHMARK_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+# Cases too slow to run at every size: case -> largest row count it runs at
+MAX_ROWS = {"generate_incident_data": 100_000}
+
+# A case regresses when it is this much slower or hungrier than its baseline...
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.25
+# ...and by more than these amounts, so timer noise on tiny cases isn't flagged
+MIN_SECONDS_CHANGE = 0.05
+MIN_MEMORY_CHANGE_MB = 1.0
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+# Template for generate_random_data, shaped like an uploaded Risk_Heatmap export
+RANDOM_DATA_TEMPLATE = pd.DataFrame({
+    "incident_id": [1, 2, 3, 4],
+    "Incident Type": ["Fall", "Medication Error", "Fall", "Pressure Ulcer"],
+    "Impact": [3, 2, 5, 1],
+    "Likelihood": [4, 1, 5, 2],
+    "Ward": ["ICU", "ICU", None, "General Ward"],
+    "Cost": [10.5, None, 7.25, 3.0],
+    "Reported": pd.to_datetime(["2024-01-02", "2024-03-01", "2024-02-10", None]),
+})
+
+def synthetic_tables(num_records, seed=0):
+    """Build Risk_Heatmap- and Incident_Dataset-shaped frames with realistic hot keys."""
+    rng = np.random.default_rng(seed)
+    fields = IncidentLoadProfile().sample(rng, num_records)
+    impact = rng.integers(1, 7, size=num_records)
+    likelihood = rng.integers(1, 7, size=num_records)
+    # Built with the dtypes fetch_data ingests these tables with
+    risk_table = riskscore.table_frame("Risk_Heatmap", {
+        "id": np.arange(1, num_records + 1),
+        "incident_type": fields["Incident Type"],
+        "impact": impact,
+        "likelihood": likelihood,
+        "risk_score": impact * likelihood,
+    })
+    incident_table = riskscore.table_frame("Incident_Dataset", {
+        "id": np.arange(1, num_records + 1),
+        "location": fields["Department"],
+        "incident_type": fields["Incident Type"],
+        "severity_level": fields["Severity"],
+        "likelihood": rng.integers(1, 7, size=num_records),
+    })
+    return risk_table, incident_table
+
+def benchmark_cases(risk_table, incident_table):
+    """Map each case name to a zero-argument callable running that path once on the given tables."""
+    risk_cube = riskscore.build_aggregate_cube(risk_table)
+    incident_cube = riskscore.build_aggregate_cube(incident_table)
+    num_records = len(risk_table)
+
+    def categorize():
+        categorize_risk_scores(risk_table["risk_score"])
+        categorize_impacts(risk_table["impact"])
+        categorize_likelihoods(risk_table["likelihood"])
+
+    def heatmap_pivot():
+        # create_heatmap / create_green_heatmap: cube groupby over raw rows, then the pivots
+        cube = riskscore.build_aggregate_cube(risk_table)
+        riskscore.build_heatmap_matrix(cube)
+        data = riskscore.rollup_cube(cube, ["impact", "likelihood"])
+        data["Impact Category"] = categorize_impacts(data["impact"])
+        data["Likelihood Category"] = categorize_likelihoods(data["likelihood"])
+        data.groupby(["Impact Category", "Likelihood Category"], observed=True)[["risk_score_sum"]].sum()
+
+    def bubble_groupby():
+        # create_bubble_chart: cube groupby over raw rows, then the severity/likelihood/type rollup
+        cube = riskscore.build_aggregate_cube(incident_table)
+        riskscore.rollup_cube(cube, ["severity_level", "likelihood", "incident_type"])
+
+    def location_value_counts():
+        incident_table["location"].value_counts()
+
+    def plotly_figures():
+        for chart in (riskscore.create_green_heatmap, riskscore.create_heatmap):
+            chart(risk_cube)
+        for chart in (riskscore.create_bubble_chart, riskscore.create_location_chart):
+            chart(incident_cube)
+
+    def generate_incidents():
+        generate_incident_data(num_records, allocator=IncidentNumberAllocator(seed=0))
+
+    def generate_incident_frame_case():
+        generate_incident_frame(num_records, seed=0)
+
+    def generate_random_data_case():
+        generate_random_data(RANDOM_DATA_TEMPLATE, num_records, describe_sample(RANDOM_DATA_TEMPLATE), seed=0)
+
+    def csv_encoding():
+        with open(os.devnull, "wb") as sink:
+            write_csv(incident_table, sink)
+
+    return {
+        "categorize": categorize,
+        "heatmap_pivot": heatmap_pivot,
+        "bubble_groupby": bubble_groupby,
+        "location_value_counts": location_value_counts,
+        "plotly_figures": plotly_figures,
+        "generate_incident_data": generate_incidents,
+        "generate_incident_frame": generate_incident_frame_case,
+        "generate_random_data": generate_random_data_case,
+        "csv_encoding": csv_encoding,
+    }
+
+def resident_mb(field):
+    """Read a memory figure (VmRSS, VmHWM, ...) of this process from /proc, in MB."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def release_free_memory():
+    """Return memory freed by earlier cases to the OS (glibc), so reusing it doesn't hide the next case's peak."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+def measure(case, repeats=1):
+    """Run case repeats times and return the fastest wall time and the largest peak memory (MB).
+
+    On Linux the peak is how far the resident high-water mark rose above the resident size at
+    the start (the mark is reset through /proc/self/clear_refs), which costs nothing while the
+    case runs. Elsewhere tracemalloc's traced peak is used, which slows pure-Python cases down.
+    """
+    use_proc = os.path.exists("/proc/self/clear_refs")
+    seconds, peak = [], []
+    for _ in range(repeats):
+        if use_proc:
+            release_free_memory()
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")  # Reset VmHWM to the current VmRSS
+            start_mb = resident_mb("VmRSS")
+        else:
+            tracemalloc.start()
+        started = time.perf_counter()
+        case()
+        seconds.append(time.perf_counter() - started)
+        if use_proc:
+            peak.append(max(resident_mb("VmHWM") - start_mb, 0.0))
+        else:
+            peak.append(tracemalloc.get_traced_memory()[1] / 2**20)
+            tracemalloc.stop()
+    return min(seconds), max(peak)
+
+def run_benchmarks(sizes=BENCHMARK_SIZES, case_names=None, repeats=1, seed=0, on_result=None):
+    """Run every case at every size and return {"case/rows": {"seconds": ..., "peak_mb": ...}}."""
+    results = {}
+    for num_records in sizes:
+        risk_table, incident_table = synthetic_tables(num_records, seed)
+        for name, case in benchmark_cases(risk_table, incident_table).items():
+            if case_names and name not in case_names or num_records > MAX_ROWS.get(name, num_records):
+                continue
+            seconds, peak_mb = measure(case, repeats)
+            results[f"{name}/{num_records}"] = {"seconds": seconds, "peak_mb": peak_mb}
+            if on_result:
+                on_result(name, num_records, results[f"{name}/{num_records}"])
+    return results
+
+def find_regressions(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """List the cases that got slower or hungrier than the baseline beyond the tolerances."""
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if (result["seconds"] > before["seconds"] * (1 + time_tolerance)
+                and result["seconds"] - before["seconds"] > MIN_SECONDS_CHANGE):
+            regressions.append(f"{key}: {before['seconds']:.3f}s -> {result['seconds']:.3f}s")
+        if (result["peak_mb"] > before["peak_mb"] * (1 + memory_tolerance)
+                and result["peak_mb"] - before["peak_mb"] > MIN_MEMORY_CHANGE_MB):
+            regressions.append(f"{key}: {before['peak_mb']:.1f}MB -> {result['peak_mb']:.1f}MB peak")
+    return regressions
+
+def cli():
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths on synthetic data and compare with a baseline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCHMARK_SIZES, help="Row counts to run at")
+    parser.add_argument("--cases", nargs="+", default=None, help="Only run these cases")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per case; the fastest time is kept")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic data")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON baseline to compare with (and to save to)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE, help="Allowed slowdown, e.g. 0.25 = 25%%")
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE, help="Allowed peak memory growth")
+    args = parser.parse_args()
+    # The chart cases call st.* outside a running app; silence its warnings (after loading
+    # Streamlit's config, which would otherwise reset the level)
+    config.get_option("logger.level")
+    set_log_level("error")
+
+    def report(name, num_records, result):
+        print(f"{name:<24} {num_records:>11,} rows {result['seconds']:>9.3f}s {result['peak_mb']:>9.1f}MB peak", flush=True)
+
+    results = run_benchmarks(args.sizes, args.cases, args.repeats, args.seed, report)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "pandas": pd.__version__,
+                "numpy": np.__version__,
+                "machine": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = find_regressions(results, baseline, args.time_tolerance, args.memory_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        print(f"{len(regressions)} regressions against {args.baseline}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    cli()
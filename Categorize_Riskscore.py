@@ -1,22 +1,321 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from supabase import create_client, Client
-
-# Supabase credentials
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
+import numpy as np
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from Supabase_Loader import get_supabase_client
+from Stage_Spans import add_span_payload, show_span_panel, traced
+from Risk_Categories import (  # Re-exported: the categorization helpers used to live here
+    IMPACT_BANDS, IMPACT_ORDER, LIKELIHOOD_BANDS, LIKELIHOOD_ORDER, RISK_BANDS, RISK_ORDER,
+    categorize_impact, categorize_impacts, categorize_likelihood, categorize_likelihoods,
+    categorize_risk, categorize_risk_scores, categorize_values,
+)
+
+# Paged fetch settings (PostgREST caps a single response at its max-rows limit, which
+# may be below PAGE_SIZE; windows keep requesting until they are filled)
+PAGE_SIZE = 1000
+MAX_FETCH_WORKERS = 4
+
+# Fetch windows cut per worker at most; windows are cut at key quantiles, so each holds
+# about the same number of rows however unevenly the keys are spread
+WINDOWS_PER_WORKER = 4
+
+# Integer primary key the fetch windows are cut on
+TABLE_PRIMARY_KEYS = {
+    "Incident_Dataset": "id",
+    "Risk_Heatmap": "id",
+}
+
+# High-water mark column used for delta refreshes. Primary keys can't be used: loader ids
+# are not increasing, and upserts change rows without adding keys. updated_at is set by
+# a default and an update trigger (sql/seed_large_tables.sql)
+TABLE_WATERMARK_COLUMNS = {
+    "Incident_Dataset": "updated_at",
+    "Risk_Heatmap": "updated_at",
+}
+
+# Compact dtypes declared per table: low-cardinality text becomes categorical and
+# small integers (smallint in Postgres, values 1-36 here) are downcast
+TABLE_SCHEMAS = {
+    "Incident_Dataset": {
+        "location": "category",
+        "incident_type": "category",
+        "severity_level": "category",
+        "reporting_staff_role": "category",
+        "likelihood": "int8",
+        "updated_at": "datetime64[ns, UTC]",
+    },
+    "Risk_Heatmap": {
+        "incident_type": "category",
+        "impact": "int8",
+        "likelihood": "int8",
+        "risk_score": "int8",
+        "updated_at": "datetime64[ns, UTC]",
+    },
+    "Incident_Dataset_Cube": {
+        "location": "category",
+        "incident_type": "category",
+        "severity_level": "category",
+        "likelihood": "int8",
+    },
+    "Risk_Heatmap_Cube": {
+        "impact": "int8",
+        "likelihood": "int8",
+    },
+}
+
+# Table cache settings
+CACHE_TTL_SECONDS = 15 * 60
+CACHE_MAX_ROWS = 2_000_000
+
+# Columns each chart reads from its table
+CHART_COLUMNS = {
+    "create_green_heatmap": ["impact", "likelihood", "risk_score"],
+    "create_heatmap": ["impact", "likelihood", "risk_score"],
+    "create_bubble_chart": ["severity_level", "likelihood", "incident_type"],
+    "create_location_chart": ["location"],
+}
+
+# Charts drawn for each table by "View Visualization"
+TABLE_CHARTS = {
+    "Risk_Heatmap": ["create_green_heatmap", "create_heatmap"],
+    "Incident_Dataset": ["create_bubble_chart", "create_location_chart"],
+}
+
+# Function to list the columns the visualization path needs from a table
+def visualization_columns(table_name: str):
+    columns = [TABLE_PRIMARY_KEYS.get(table_name, "id"), TABLE_WATERMARK_COLUMNS.get(table_name, "id")]
+    for chart in TABLE_CHARTS.get(table_name, []):
+        columns.extend(CHART_COLUMNS[chart])
+    return list(dict.fromkeys(columns))  # Union, keeping the declared order
+
+# Function to build a select query, optionally projected to some columns and limited to rows past a watermark
+def build_query(table_name: str, columns=None, after=None, **select_options):
+    query = get_supabase_client().table(table_name).select(",".join(columns) if columns else "*", **select_options)
+    if after is not None:
+        query = query.gt(TABLE_WATERMARK_COLUMNS.get(table_name, "id"), after)
+    return query
+
+# Function to count the rows in a Supabase table without downloading them
+def count_rows(table_name: str, after=None):
+    from postgrest import CountMethod
+
+    response = build_query(table_name, after=after, count=CountMethod.exact, head=True).execute()
+    return response.count or 0
+
+# Function to sample the primary key of a table (past a watermark) at evenly spaced row
+# offsets, giving the edges of windows that hold about total_rows / parts rows each
+def key_quantiles(table_name: str, total_rows: int, parts: int, after=None, max_workers: int = MAX_FETCH_WORKERS):
+    primary_key = TABLE_PRIMARY_KEYS.get(table_name, "id")
+
+    # Each sample reads one key from the primary key index; only the edges are fetched this way
+    def key_at(offset):
+        response = build_query(table_name, [primary_key], after).order(primary_key).range(offset, offset).execute()
+        return response.data[0][primary_key] if response.data else None
+
+    offsets = [total_rows * part // parts for part in range(parts)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        keys = list(executor.map(key_at, offsets))
+    # Rows deleted since the count leave the last offsets empty
+    return sorted({key for key in keys if key is not None})
+
+# Function to fetch the rows of a Supabase table whose primary key is in [low, high)
+# (high=None for no upper bound)
+def fetch_window(table_name: str, low: int, high=None, columns=None, after=None, page_size: int = PAGE_SIZE):
+    primary_key = TABLE_PRIMARY_KEYS.get(table_name, "id")
+    rows = []
+    while True:
+        # Keyset pagination: each request starts past the last key seen, so Postgres
+        # seeks on the index instead of skipping an OFFSET of rows
+        query = build_query(table_name, columns, after).order(primary_key).limit(page_size)
+        if high is not None:
+            query = query.lt(primary_key, high)
+        query = query.gt(primary_key, rows[-1][primary_key]) if rows else query.gte(primary_key, low)
+        page = query.execute().data
+        rows.extend(page)
+        # A short response may just be the server's max-rows cap, so only an empty
+        # response or reaching the end of the window means the window is complete
+        if not page or high is not None and rows[-1][primary_key] >= high - 1:
+            return rows
+
+# Function to build one column in its declared compact dtype
+def compact_column(values, dtype=None):
+    if dtype == "category":
+        return pd.Categorical(values)
+    if dtype is not None and dtype.startswith("datetime64"):
+        return pd.to_datetime(values, utc=True, format="ISO8601")
+    if dtype is not None:
+        try:
+            array = pd.array(values, dtype=dtype.capitalize())  # Nullable, so missing values fit
+        except (TypeError, ValueError, OverflowError):
+            # Values outside the declared range: keep the smallest integer type they fit in
+            return pd.to_numeric(pd.Series(values), downcast="integer")
+        return array if array.isna().any() else array.to_numpy(dtype=dtype)
+    return values
+
+# Function to build a table's DataFrame column by column, in the table's declared dtypes
+def table_frame(table_name: str, columns):
+    schema = TABLE_SCHEMAS.get(table_name, {})
+    return pd.DataFrame({name: compact_column(values, schema.get(name)) for name, values in columns.items()})
+
+# Function to turn the rows of a PostgREST response into a compact DataFrame
+def rows_to_frame(table_name: str, rows):
+    if not rows:
+        return pd.DataFrame()
+    # Transpose to one list per column, so no object-dtype frame is built on the way
+    return table_frame(table_name, {name: [row.get(name) for row in rows] for name in rows[0]})
+
+# Function to concatenate table chunks, keeping categorical columns categorical
+# (pandas falls back to object when the chunks saw different categories)
+def concat_tables(frames):
+    frames = [frame for frame in frames if not frame.empty] or frames[:1]
+    for name in frames[0].columns:
+        if isinstance(frames[0][name].dtype, pd.CategoricalDtype):
+            categories = frames[0][name].cat.categories
+            for frame in frames[1:]:
+                categories = categories.union(frame[name].astype("category").cat.categories)
+            frames = [frame.assign(**{name: frame[name].astype(pd.CategoricalDtype(categories))}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+# Function to fetch a table page by page with a bounded pool of workers
+@traced()
+def fetch_paged(table_name: str, columns=None, after=None, page_size: int = PAGE_SIZE, max_workers: int = MAX_FETCH_WORKERS):
+    total_rows = count_rows(table_name, after)
+    parts = min(-(-total_rows // page_size), max_workers * WINDOWS_PER_WORKER)
+    edges = key_quantiles(table_name, total_rows, parts, after, max_workers) if total_rows else []
+    if not edges:
+        return pd.DataFrame()
+
+    # Cut the table at the sampled keys; the last window is open-ended, so rows added since
+    # the count are still read
+    windows = list(zip(edges, edges[1:] + [None]))
+    pages = [None] * len(windows)
+    progress = st.progress(0.0, text=f"Fetching {table_name}...")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_window, table_name, start, end, columns, after, page_size): index
+            for index, (start, end) in enumerate(windows)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            # Convert each page to compact columns as soon as it arrives instead of collecting raw rows
+            pages[futures[future]] = rows_to_frame(table_name, future.result())
+            progress.progress(done / len(windows), text=f"Fetched {done}/{len(windows)} pages of {table_name}")
+
+    progress.empty()
+    return concat_tables(pages)
+
+# Shared cache of fetched tables, kept across reruns and sessions. "lock" guards the
+# entries and is only held to read or swap them; each key also has a fetch lock so
+# sessions wanting the same table wait for one fetch instead of repeating it
+@st.cache_resource
+def get_table_cache():
+    return {"lock": threading.Lock(), "entries": OrderedDict(), "fetch_locks": {}}
+
+# Function to build the cache key of a table fetched with a given projection
+def table_cache_key(table_name: str, columns=None):
+    return (table_name, tuple(columns) if columns else "*")
+
+# Function to drop expired tables and the least recently used ones over the row budget
+def evict_cached_tables(entries, now):
+    for key in [key for key, entry in entries.items() if now - entry["fetched_at"] > CACHE_TTL_SECONDS]:
+        del entries[key]
+    while len(entries) > 1 and sum(len(entry["data"]) for entry in entries.values()) > CACHE_MAX_ROWS:
+        entries.popitem(last=False)
+
+# Function to clear the table cache so the next fetch reloads everything
+def clear_table_cache():
+    cache = get_table_cache()
+    with cache["lock"]:
+        cache["entries"].clear()
+
+# Function to get the lock serializing fetches of one cached table
+def table_fetch_lock(cache, key):
+    with cache["lock"]:
+        return cache["fetch_locks"].setdefault(key, threading.Lock())
+
+# Function to read the high-water mark of fetched rows in the form PostgREST filters take
+def column_watermark(values):
+    watermark = values.max()
+    return watermark.isoformat() if isinstance(watermark, pd.Timestamp) else watermark
+
+# Function to bring a cached table up to date by fetching only rows past its watermark
+def sync_table(table_name: str, columns=None):
+    cache = get_table_cache()
+    key = table_cache_key(table_name, columns)
+    watermark_column = TABLE_WATERMARK_COLUMNS.get(table_name, "id")
+    primary_key = TABLE_PRIMARY_KEYS.get(table_name, "id")
+
+    # Fetch without holding the cache lock, so other tables stay readable meanwhile
+    with table_fetch_lock(cache, key):
+        with cache["lock"]:
+            entries = cache["entries"]
+            evict_cached_tables(entries, time.time())
+            entry = entries.get(key)
+            if entry is not None:
+                entries.move_to_end(key)
+
+        if entry is None:
+            data = fetch_paged(table_name, columns)
+            fetched_at = time.time()
+        else:
+            new_rows = fetch_paged(table_name, columns, after=entry["watermark"])
+            data = entry["data"]
+            if not new_rows.empty:
+                # Updated rows are re-sent with a new updated_at and replace their cached version
+                data = concat_tables([data, new_rows])
+                data = data.drop_duplicates(subset=primary_key, keep="last", ignore_index=True)
+            fetched_at = entry["fetched_at"]
+
+            # Deleted rows, or rows committed with an updated_at older than the watermark,
+            # leave the cache out of step with the table's row count: reload it whole
+            if len(data) != count_rows(table_name):
+                data = fetch_paged(table_name, columns)
+                fetched_at = time.time()
+            elif new_rows.empty:
+                # Nothing new: keep the entry (and any aggregate cube built from it)
+                return entry["data"].copy(deep=False)
+
+        with cache["lock"]:
+            entries = cache["entries"]
+            if data.empty:
+                entries.pop(key, None)
+                return data
+
+            entries[key] = {
+                "data": data,
+                "watermark": column_watermark(data[watermark_column]),
+                "fetched_at": fetched_at,
+            }
+            entries.move_to_end(key)
+            evict_cached_tables(entries, time.time())
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    # Shallow copy so chart helpers adding columns don't modify the cached frame
+    return data.copy(deep=False)
 
-# Function to fetch data from a Supabase table
-def fetch_data(table_name: str):
+# Function to fetch data from a Supabase table (all columns unless a projection is given)
+@traced()
+def fetch_data(table_name: str, columns=None, paged: bool = True, cached: bool = True):
     try:
-        # Query data from the specified table
-        response = supabase.table(table_name).select("*").execute()
-        if response.data:
-            return pd.DataFrame(response.data)  # Convert to pandas DataFrame
+        if paged:
+            data = sync_table(table_name, columns) if cached else fetch_paged(table_name, columns)
+            if data.empty:
+                st.write(f"No data found in the table '{table_name}'.")
+            return data
+
+        from postgrest import CountMethod
+
+        # Query data from the specified table in one request, counting its rows alongside
+        primary_key = TABLE_PRIMARY_KEYS.get(table_name, "id")
+        response = build_query(table_name, columns, count=CountMethod.exact).order(primary_key).execute()
+        rows = response.data
+        if rows and len(rows) < (response.count or 0):
+            # Cut short by the server's max-rows limit: fetch the rest past the last key
+            rows += fetch_window(table_name, rows[-1][primary_key] + 1, columns=columns)
+        if rows:
+            return rows_to_frame(table_name, rows)  # Convert to a compact pandas DataFrame
         else:
             st.write(f"No data found in the table '{table_name}'.")
             return pd.DataFrame()  # Return an empty DataFrame if no data found
@@ -24,37 +323,101 @@ def fetch_data(table_name: str):
         st.error(f"An error occurred while fetching data: {str(e)}")
         return pd.DataFrame()  # Return an empty DataFrame on error
 
-# Function to categorize risk based on risk score
-def categorize_risk(score):
-    if score > 17:
-        return "Very High"
-    elif 10 < score <= 17:
-        return "High"
-    elif 5 <= score <= 10:
-        return "Medium"
-    else:
-        return "Low"
-    
+# Dimensions kept in the aggregate cube; every chart groups by a subset of them
+CUBE_DIMENSIONS = ["severity_level", "likelihood", "incident_type", "location", "impact"]
+
+# Function to aggregate a table into counts and risk score sums in one groupby pass
+@traced()
+def build_aggregate_cube(data):
+    dimensions = [column for column in CUBE_DIMENSIONS if column in data.columns]
+    measures = {"count": (dimensions[0], "size")}
+    if "risk_score" in data.columns:
+        measures["risk_score_sum"] = ("risk_score", "sum")
+        measures["risk_score_count"] = ("risk_score", "count")
+
+    # Keep missing keys here; each chart drops them for its own dimensions when rolling up
+    return data.groupby(dimensions, as_index=False, observed=True, dropna=False).agg(**measures)
+
+# Function to roll the cube up to a subset of its dimensions
+def rollup_cube(cube, dimensions):
+    measures = [column for column in ["count", "risk_score_sum", "risk_score_count"] if column in cube.columns]
+    return cube.groupby(dimensions, as_index=False, observed=True)[measures].sum()
+
+# Views in sql/chart_aggregates.sql that compute each table's cube in Postgres
+CUBE_VIEWS = {
+    "Incident_Dataset": "Incident_Dataset_Cube",
+    "Risk_Heatmap": "Risk_Heatmap_Cube",
+}
+
+# Aggregation backends offered in the sidebar
+AGGREGATION_BACKENDS = ["pandas", "Postgres"]
+
+# Function to fetch a table's aggregate cube from its Postgres view
+def fetch_server_cube(table_name: str):
+    # The views are small and recomputed by the database on every request, so they are
+    # fetched in one request rather than paged (each page would rerun the GROUP BY) and
+    # are not cached here
+    cube = fetch_data(CUBE_VIEWS[table_name], paged=False)
+    return cube.drop(columns="id", errors="ignore")
+
+# Function to fetch the columns a table's charts need and return their aggregate cube,
+# reusing the cached cube while the table is unchanged
+@traced()
+def fetch_aggregate_cube(table_name: str, backend: str = "pandas"):
+    if backend == "Postgres":
+        return fetch_server_cube(table_name)
+
+    columns = visualization_columns(table_name)
+    data = fetch_data(table_name, columns)
+    if data.empty:
+        return data
+
+    cache = get_table_cache()
+    key = table_cache_key(table_name, columns)
+    with cache["lock"]:
+        entry = cache["entries"].get(key)
+        if entry is not None and "cube" in entry:
+            return entry["cube"]
+
+    cube = build_aggregate_cube(data)
+    with cache["lock"]:
+        if entry is not None and cache["entries"].get(key) is entry:
+            entry["cube"] = cube
+    return cube
+
+# Function to check that the Postgres views give the same cube as the pandas path,
+# raising an AssertionError that describes the first difference (tests/test_chart_aggregates.py
+# runs it against a local database seeded with sql/seed_large_tables.sql)
+def compare_aggregation_backends(table_name: str):
+    local_cube = fetch_aggregate_cube(table_name, backend="pandas")
+    server_cube = fetch_aggregate_cube(table_name, backend="Postgres")
+    assert not local_cube.empty, f"no rows fetched from {table_name}"
+    assert not server_cube.empty, f"no rows fetched from {CUBE_VIEWS[table_name]}"
+    dimensions = [column for column in CUBE_DIMENSIONS if column in local_cube.columns]
+
+    local_cube = local_cube.sort_values(dimensions, ignore_index=True)
+    server_cube = server_cube[local_cube.columns].sort_values(dimensions, ignore_index=True)
+    pd.testing.assert_frame_equal(
+        local_cube, server_cube, check_dtype=False, check_categorical=False, obj=f"{table_name} cube"
+    )
+
+# Function to send a figure to the browser, counting its serialized size towards the chart's span
+def show_chart(fig):
+    add_span_payload(len(fig.to_json()))
+    st.plotly_chart(fig)
+
+# Function to build the impact x likelihood grid of summed risk scores (unit bins, empty cells are 0)
+def build_heatmap_matrix(cube):
+    cells = rollup_cube(cube, ["impact", "likelihood"])
+    matrix = cells.pivot(index="impact", columns="likelihood", values="risk_score_sum")
+    impacts = np.arange(int(cells["impact"].min()), int(cells["impact"].max()) + 1)
+    likelihoods = np.arange(int(cells["likelihood"].min()), int(cells["likelihood"].max()) + 1)
+    return matrix.reindex(index=impacts, columns=likelihoods).fillna(0)
+
+@traced()
+def create_green_heatmap(cube):
+    import plotly.graph_objects as go
 
-# Function to categorize impact
-def categorize_impact(value):
-    if value <= 2:
-        return "Insignificant"
-    elif 3 <= value <=4 :
-        return "Moderate"
-    else:
-        return "Critical"
-
-# Function to categorize likelihood
-def categorize_likelihood(value):
-    if value <= 2:
-        return "Unlikely"
-    elif 3 <= value <= 4:
-        return "Potential"
-    else:
-        return "Likely"
-
-def create_green_heatmap(data):
     try:
         st.subheader("Risk Heatmap Visualization")
 
@@ -66,18 +429,30 @@ def create_green_heatmap(data):
             (1.0, "red")      # High risk
         ]
 
-        # Create the heatmap using Plotly
-        fig = px.density_heatmap(
-            data_frame=data,
-            x="likelihood",
-            y="impact",
-            z="risk_score",
-            color_continuous_scale=["green", "yellow", "orange", "red"],
-            labels={"likelihood": "Likelihood", "impact": "Impact", "risk_score": "Risk Score"},
+        # Sum risk scores per impact/likelihood cell on the server
+        matrix = build_heatmap_matrix(cube)
+
+        # Draw the small dense matrix instead of letting Plotly bin raw rows in the browser
+        fig = go.Figure(
+            go.Heatmap(
+                x=matrix.columns,
+                y=matrix.index,
+                z=matrix.to_numpy(),
+                coloraxis="coloraxis",
+                hovertemplate="Likelihood=%{x}<br>Impact=%{y}<br>sum of Risk Score=%{z}<extra></extra>",
+            )
+        )
+        fig.update_layout(
+            coloraxis=dict(
+                colorscale=["green", "yellow", "orange", "red"],
+                colorbar=dict(title=dict(text="sum of Risk Score")),
+            ),
+            xaxis_title="Likelihood",
+            yaxis_title="Impact",
         )
 
         # Show the heatmap
-        st.plotly_chart(fig)
+        show_chart(fig)
     except Exception as e:
         st.error(f"Error creating heatmap: {str(e)}")
 
@@ -123,12 +498,16 @@ def create_green_heatmap(data):
 #     except Exception as e:
 #         st.error(f"Error creating timeline chart: {str(e)}")
 
-def create_bubble_chart(data):
+@traced()
+def create_bubble_chart(cube):
+    import plotly.express as px
+
     try:
         st.subheader("Severity vs. Likelihood Bubble Chart")
 
-        # Group data by Severity Level, Likelihood, and Incident Type to count occurrences
-        grouped_data = data.groupby(['severity_level', 'likelihood', 'incident_type'], as_index=False).size()
+        # Roll the cube up to Severity Level, Likelihood, and Incident Type to count occurrences
+        grouped_data = rollup_cube(cube, ['severity_level', 'likelihood', 'incident_type'])
+        grouped_data = grouped_data.rename(columns={'count': 'size'})[['severity_level', 'likelihood', 'incident_type', 'size']]
 
         # Create a bubble chart using Plotly
         fig = px.scatter(
@@ -156,17 +535,21 @@ def create_bubble_chart(data):
         )
 
         # Show the chart in Streamlit
-        st.plotly_chart(fig)
+        show_chart(fig)
     except Exception as e:
         st.error(f"Error creating bubble chart: {str(e)}")
 
-def create_location_chart(data):
+@traced()
+def create_location_chart(cube):
+    import plotly.express as px
+
     try:
         st.subheader("Incident Distribution by Location")
 
-        # Count the number of incidents per location
-        location_counts = data['location'].value_counts().reset_index()
+        # Count the number of incidents per location from the cube
+        location_counts = rollup_cube(cube, ['location'])[['location', 'count']]
         location_counts.columns = ['location', 'Count']
+        location_counts = location_counts.sort_values('Count', ascending=False, kind='stable', ignore_index=True)
 
         # Create a pie chart
         fig_pie = px.pie(
@@ -189,21 +572,26 @@ def create_location_chart(data):
         fig_bar.update_layout(template="plotly_white", xaxis_title="Location", yaxis_title="Number of Incidents")
 
         # Display the charts
-        st.plotly_chart(fig_pie)
-        st.plotly_chart(fig_bar)
+        show_chart(fig_pie)
+        show_chart(fig_bar)
     except Exception as e:
         st.error(f"Error creating location charts: {str(e)}")
 
-def create_heatmap(data):
+@traced()
+def create_heatmap(cube):
+    import plotly.express as px
+
     try:
         st.subheader("Risk Heatmap Visualization (Categorized)")
 
-        # Categorize impact and likelihood columns
-        data["Impact Category"] = data["impact"].apply(categorize_impact)
-        data["Likelihood Category"] = data["likelihood"].apply(categorize_likelihood)
+        # Categorize impact and likelihood columns of the cube
+        data = rollup_cube(cube, ["impact", "likelihood"])
+        data["Impact Category"] = categorize_impacts(data["impact"])
+        data["Likelihood Category"] = categorize_likelihoods(data["likelihood"])
 
         # Handle duplicates by aggregating (e.g., take the average risk_score)
-        data = data.groupby(["Impact Category", "Likelihood Category"], as_index=False).agg({"risk_score": "mean"})
+        data = data.groupby(["Impact Category", "Likelihood Category"], as_index=False, observed=True)[["risk_score_sum", "risk_score_count"]].sum()
+        data["risk_score"] = data["risk_score_sum"] / data["risk_score_count"]
 
         # Prepare the data for the heatmap
         heatmap_data = data.pivot(index="Impact Category", columns="Likelihood Category", values="risk_score")
@@ -251,7 +639,7 @@ def create_heatmap(data):
         )
 
         # Show the heatmap
-        st.plotly_chart(fig)
+        show_chart(fig)
 
 
     except Exception as e:
@@ -330,6 +718,12 @@ def main():
     table_options = ["Incident_Dataset", "Risk_Heatmap"]
     selected_table = st.sidebar.selectbox("Select Table", table_options)
 
+    backend = st.sidebar.radio("Aggregation", AGGREGATION_BACKENDS, horizontal=True)
+    show_timings = st.sidebar.checkbox("Show stage timings", value=False)
+
+    if st.sidebar.button("Clear Cache"):
+        clear_table_cache()
+
     if st.sidebar.button("Process Table"):
         # Fetch and display the selected table
         data = fetch_data(selected_table)
@@ -340,18 +734,22 @@ def main():
     if st.sidebar.button("View Visualization"):
         # Fetch data and generate heatmap for Risk_Heatmap table
         if selected_table == "Risk_Heatmap":
-            risk_heatmap_data = fetch_data("Risk_Heatmap")
-            if not risk_heatmap_data.empty:
-                create_green_heatmap(risk_heatmap_data)
-                create_heatmap(risk_heatmap_data)
+            risk_heatmap_cube = fetch_aggregate_cube("Risk_Heatmap", backend)
+            if not risk_heatmap_cube.empty:
+                create_green_heatmap(risk_heatmap_cube)
+                create_heatmap(risk_heatmap_cube)
                 display_risk_ranking_table()
 
         if selected_table == "Incident_Dataset":
-            incident_data = fetch_data("Incident_Dataset")
-            if not incident_data.empty:
+            incident_cube = fetch_aggregate_cube("Incident_Dataset", backend)
+            if not incident_cube.empty:
                 # create_timeline_chart(incident_data)
-                create_bubble_chart(incident_data)
-                create_location_chart(incident_data)
+                create_bubble_chart(incident_cube)
+                create_location_chart(incident_cube)
+
+    # Drawn last so it includes the stages of this run
+    if show_timings:
+        show_span_panel()
 
 
     
@@ -0,0 +1,64 @@
+import tempfile
+import streamlit as st
+from Stage_Spans import traced
+
+# Rows encoded per chunk; export memory is bounded by one encoded chunk, not the whole file
+EXPORT_CHUNK_SIZE = 100_000
+
+# Compression used for Parquet downloads
+PARQUET_COMPRESSION = "zstd"
+
+def iter_csv_chunks(df, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the CSV encoding of a DataFrame as UTF-8 bytes, chunk_size rows at a time."""
+    for start in range(0, max(len(df), 1), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        yield chunk.to_csv(index=False, header=(start == 0)).encode("utf-8")
+
+def write_csv(df, file, chunk_size=EXPORT_CHUNK_SIZE):
+    """Stream a DataFrame as CSV into a path or binary file object."""
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            return write_csv(df, f, chunk_size)
+    for chunk in iter_csv_chunks(df, chunk_size):
+        file.write(chunk)
+    return file
+
+def write_parquet(df, file, chunk_size=EXPORT_CHUNK_SIZE, compression=PARQUET_COMPRESSION):
+    """Write a DataFrame as compressed Parquet into a path or binary file object, one row group per chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(file, schema, compression=compression) as writer:
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    return file
+
+@traced()
+def export_to_tempfile(df, file_format):
+    """Encode a DataFrame into an anonymous temp file and return it rewound for reading."""
+    file = tempfile.TemporaryFile()
+    if file_format == "parquet":
+        write_parquet(df, file)
+    else:
+        write_csv(df, file)
+    file.seek(0)
+    return file
+
+def export_download_buttons(df, label, file_stem):
+    """Show CSV and Parquet download buttons that encode the data only when clicked."""
+    st.download_button(
+        label=f"{label} as CSV",
+        data=lambda: export_to_tempfile(df, "csv"),
+        file_name=f"{file_stem}.csv",
+        mime="text/csv",
+        on_click="ignore",
+    )
+    st.download_button(
+        label=f"{label} as Parquet",
+        data=lambda: export_to_tempfile(df, "parquet"),
+        file_name=f"{file_stem}.parquet",
+        mime="application/vnd.apache.parquet",
+        on_click="ignore",
+    )
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+# Words combined into incident types; 2-3 words each, letters only like the real model's output
+QUALIFIERS = [
+    "Delayed", "Missed", "Incorrect", "Unplanned", "Wrong", "Failed", "Unsafe", "Unwitnessed",
+    "Late", "Duplicate", "Inadequate", "Unreported", "Accidental", "Contaminated", "Expired",
+    "Omitted", "Mislabelled", "Interrupted", "Unauthorised", "Incomplete",
+]
+SUBJECTS = [
+    "Medication Dose", "Patient Fall", "Blood Transfusion", "Surgical Count", "Specimen Label",
+    "Discharge", "Handover", "Infusion Pump", "Catheter Care", "Pressure Ulcer", "Sepsis Escalation",
+    "Allergy Check", "Consent", "Imaging Request", "Oxygen Supply", "Restraint Use", "Wound Dressing",
+    "Lab Result", "Bed Rail", "Hand Hygiene", "Insulin Dose", "Anaesthesia", "Referral", "Triage",
+    "Sterile Field",
+]
+
+# Lines a chatty model adds, or gets wrong, in place of a well-formed line
+PREAMBLES = ["Here are the incident types you asked for:", "Sure! Below is the list.", ""]
+
+class FakeInferenceClient:
+    """Offline, deterministic stand-in for huggingface_hub.InferenceClient chat completions.
+
+    Replies look like the real model's: "Type: Impact, Likelihood" lines when the prompt asks
+    for them, bare incident types otherwise, about 1.5x the requested count, cut off at
+    max_tokens. Each reply waits latency seconds, then streams one word per token at
+    tokens_per_second; malformed_rate of the lines are deliberately unparseable. The same
+    prompt and seed always give the same reply. Counts of requests and lines sent (in total
+    and malformed) are kept in stats.
+    """
+
+    def __init__(self, latency=0.5, tokens_per_second=50.0, malformed_rate=0.05, seed=0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+        self.stats = {"requests": 0, "lines": 0, "malformed_lines": 0}
+        self.lock = threading.Lock()
+        # Same attribute path as InferenceClient: client.chat.completions.create(...)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, max_tokens=2000, stream=False, **kwargs):
+        tokens = self.reply_tokens(messages, max_tokens)
+        with self.lock:
+            self.stats["requests"] += 1
+        if stream:
+            return self.stream_chunks(tokens)
+        self.wait(time.monotonic(), len(tokens))
+        return {"choices": [{"message": {"content": "".join(tokens)}}]}
+
+    def stream_chunks(self, tokens):
+        started = time.monotonic()
+        for index, token in enumerate(tokens, start=1):
+            self.wait(started, index)
+            yield {"choices": [{"delta": {"content": token}}]}
+
+    def wait(self, started, tokens_sent):
+        """Sleep until tokens_sent tokens would have arrived, so pacing doesn't drift with sleep overhead."""
+        due = started + self.latency + tokens_sent / self.tokens_per_second
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def reply_tokens(self, messages, max_tokens):
+        prompt = messages[-1]["content"]
+        digest = hashlib.sha256(json.dumps([self.seed, messages]).encode("utf-8")).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big"))
+
+        requested = re.search(r"(?:input|exactly) (\d+)", prompt)
+        count = int(requested.group(1)) if requested else 50
+        with_scores = "Incident Type: Impact, Likelihood" in prompt
+        excluded = set()
+        note = re.search(r"which already exist: (.*)\.", prompt)
+        if note:
+            excluded = {incident_type.strip().casefold() for incident_type in note.group(1).split(",")}
+
+        tokens = []
+        for _ in range(int(count * 1.5)):
+            line, malformed = self.reply_line(rng, with_scores, excluded)
+            words = [word + " " for word in line.split(" ")]
+            words[-1] = words[-1][:-1] + "\n"
+            if len(tokens) + len(words) > max_tokens:
+                break  # Truncated mid-list, like a reply that hits max_tokens
+            tokens.extend(words)
+            with self.lock:
+                self.stats["lines"] += 1
+                self.stats["malformed_lines"] += malformed
+        return tokens
+
+    def reply_line(self, rng, with_scores, excluded):
+        """Return one reply line and whether it is malformed."""
+        incident_type = f"{rng.choice(QUALIFIERS)} {rng.choice(SUBJECTS)}"
+        for _ in range(10):
+            if incident_type.casefold() not in excluded:
+                break
+            incident_type = f"{rng.choice(QUALIFIERS)} {rng.choice(SUBJECTS)}"
+        scores = f": {rng.randint(1, 6)}, {rng.randint(1, 6)}" if with_scores else ""
+        if rng.random() < self.malformed_rate:
+            return rng.choice([
+                f"{rng.randint(1, 99)}. {incident_type}{scores}",
+                f"{incident_type}{scores.replace(', ', '/').replace(':', ' -')}" if with_scores else f"- {incident_type}",
+                rng.choice(PREAMBLES),
+            ]), True
+        return f"{incident_type}{scores}", False
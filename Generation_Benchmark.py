@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import itertools
+import json
+import tempfile
+import time
+import pandas as pd
+import Llama_Inference
+from Fake_Inference import FakeInferenceClient
+from AI_Generated_Dataset import generate_incident_data_with_llama
+from AI_Record_Generator import generate_incident_types_with_llama
+
+# Generation pipelines under test; both take (num_records, use_cache, on_record, report, inference_client)
+PIPELINES = {
+    "incidents": generate_incident_data_with_llama,
+    "incident_types": generate_incident_types_with_llama,
+}
+
+def run_pipeline(pipeline, num_records, inference_client):
+    """Run one pipeline end to end against inference_client and return its measurements.
+
+    Parse yield is the share of streamed lines that became accepted records; lines lost to
+    malformed output, duplicates and overshoot past num_records all count against it.
+    """
+    first_record = []
+
+    def on_record(record):
+        if not first_record:
+            first_record.append(time.perf_counter())
+
+    report = {}
+    lines_before = inference_client.stats["lines"]
+    malformed_before = inference_client.stats["malformed_lines"]
+    started = time.perf_counter()
+    records = asyncio.run(PIPELINES[pipeline](num_records, False, on_record, report, inference_client))
+    seconds = time.perf_counter() - started
+
+    lines = inference_client.stats["lines"] - lines_before
+    accepted = report["accepted"]
+    return {
+        "pipeline": pipeline,
+        "records": num_records,
+        "accepted": accepted,
+        "padded": len(records) - accepted,
+        "seconds": seconds,
+        "first_record_seconds": first_record[0] - started if first_record else None,
+        "records_per_second": accepted / seconds if seconds else 0.0,
+        "lines": lines,
+        "malformed_lines": inference_client.stats["malformed_lines"] - malformed_before,
+        "parse_yield": accepted / lines if lines else 0.0,
+        "requests": report["requests"],
+        "rounds": report["rounds"],
+        "tokens_per_record": report["tokens_per_record"],
+    }
+
+def run_benchmarks(record_counts, latencies, token_rates, malformed_rates, pipelines=tuple(PIPELINES), seed=0):
+    """Run every pipeline for every combination of settings against a fresh fake client.
+
+    Completions are cached in a throwaway directory so the real cache is never touched.
+    """
+    results = []
+    cache_path = Llama_Inference.CACHE_PATH
+    with tempfile.TemporaryDirectory() as cache_dir:
+        Llama_Inference.CACHE_PATH = f"{cache_dir}/completions.sqlite3"
+        try:
+            for pipeline, num_records, latency, rate, malformed_rate in itertools.product(
+                pipelines, record_counts, latencies, token_rates, malformed_rates
+            ):
+                inference_client = FakeInferenceClient(latency, rate, malformed_rate, seed)
+                result = run_pipeline(pipeline, num_records, inference_client)
+                result.update(latency=latency, tokens_per_second=rate, malformed_rate=malformed_rate)
+                results.append(result)
+        finally:
+            Llama_Inference.CACHE_PATH = cache_path
+    return results
+
+def cli():
+    parser = argparse.ArgumentParser(description="Benchmark the AI generation pipelines against an offline fake model.")
+    parser.add_argument("--records", type=int, nargs="+", default=[60, 240], help="Record counts to generate")
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.3], help="Seconds before each reply starts")
+    parser.add_argument("--tokens-per-second", type=float, nargs="+", default=[200.0], help="Streaming token rates")
+    parser.add_argument("--malformed-rate", type=float, nargs="+", default=[0.0, 0.1], help="Shares of malformed lines")
+    parser.add_argument("--pipeline", choices=list(PIPELINES), nargs="+", default=list(PIPELINES), help="Pipelines to run")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the fake model's replies")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        args.records, args.latency, args.tokens_per_second, args.malformed_rate, args.pipeline, args.seed
+    )
+    columns = [
+        "pipeline", "records", "latency", "tokens_per_second", "malformed_rate", "accepted", "seconds",
+        "first_record_seconds", "records_per_second", "parse_yield", "requests", "rounds",
+    ]
+    print(pd.DataFrame(results)[columns].to_string(index=False, float_format=lambda value: f"{value:.3g}"))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    cli()
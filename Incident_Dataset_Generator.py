@@ -1,9 +1,24 @@
 import pandas as pd
+import numpy as np
 import random
+import datetime
+import os
+import argparse
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor
 import streamlit as st
-from faker import Faker
+from Dataset_Export import export_download_buttons, write_csv, write_parquet
+from Supabase_Loader import load_with_progress
+from Incident_Numbers import IncidentNumberAllocator, reserve_incident_numbers
+from Stage_Spans import traced
 
-fake = Faker()
+# Function to create the shared Faker instance on first use (importing faker is slow)
+@functools.cache
+def get_faker():
+    from faker import Faker
+
+    return Faker()
 
 # Defining sample data categories
 departments = ['ICU', 'Surgery Room', 'Emergency Room', 'Pharmacy', 'Radiology', 'Pediatrics Ward', 'General Ward', 'Maternity Ward', 'Oncology']
@@ -13,12 +28,19 @@ staff = ['Nurse', 'Surgeon', 'Technician', 'Radiologist', 'Respiratory Therapist
 actions = ['Review medication protocols', 'Increase monitoring', 'Equipment maintenance review', 'Implement strict protocols', 'Staff training session', 'Reinforce chemotherapy protocols', 'Review patient care practices']
 severity = ['High', 'Medium', 'Low']
 
+# Process-wide allocator so numbers stay unique across calls, like fake.unique did
+incident_numbers = IncidentNumberAllocator(seed=random.randrange(2**32))
+
 # Function to generate random data
-def generate_incident_data(num_records):
+@traced()
+def generate_incident_data(num_records, allocator=None):
+    allocator = allocator or incident_numbers
+    fake = get_faker()
+    incident_numbers_batch = allocator.allocate_many(num_records).tolist()
     incidents = []
-    for _ in range(num_records):
+    for incident_number in incident_numbers_batch:
         incident = {
-            'Incident Number': fake.unique.random_number(digits=8, fix_len=True),
+            'Incident Number': incident_number,
             'Date': fake.date_this_year(),
             'Time': fake.time(),
             'Department': random.choice(departments),
@@ -33,32 +55,281 @@ def generate_incident_data(num_records):
         incidents.append(incident)
     return incidents
 
+# Size of the pre-generated description pool used by the vectorized generator
+SENTENCE_POOL_SIZE = 1000
+
+# Rows of a generated dataset shown in the app (the download has all of them)
+PREVIEW_ROWS = 1000
+
+# Function to build all "HH:MM:SS" strings of a day, indexed by second; built on first use
+# from digit codes, since this module is the Streamlit script and reruns on every interaction
+@functools.cache
+def get_time_strings():
+    seconds = np.arange(86400)
+    characters = np.full((86400, 8), ord(":"), dtype=np.uint8)
+    digits = [seconds // 36000, seconds // 3600 % 10, seconds // 600 % 6, seconds // 60 % 10, seconds % 60 // 10, seconds % 10]
+    for position, digit in zip([0, 1, 3, 4, 6, 7], digits):
+        characters[:, position] = digit + ord("0")
+    return characters.view("S8").ravel().astype("U8")
+
+# Function to draw a categorical column from a list of values
+def random_categorical(rng, values, num_records):
+    codes = rng.integers(0, len(values), size=num_records)
+    return pd.Categorical.from_codes(codes, categories=values)
+
+# Conditional weights for the realistic load profile; each row lines up with its value list above
+SEVERITY_GIVEN_TYPE = {  # High, Medium, Low
+    'Medication Error': [0.25, 0.45, 0.30],
+    'Fall': [0.20, 0.40, 0.40],
+    'Infection Control': [0.35, 0.40, 0.25],
+    'Equipment Failure': [0.15, 0.35, 0.50],
+    'Patient Miscommunication': [0.05, 0.30, 0.65],
+    'Surgical Error': [0.60, 0.30, 0.10],
+    'Procedure Complication': [0.45, 0.40, 0.15],
+    'Pressure Ulcer': [0.20, 0.50, 0.30],
+}
+OUTCOME_GIVEN_SEVERITY = {  # Patient stable, No harm, Minor injury, Major intervention, Isolated cases, Rescheduled scan
+    'High': [0.20, 0.02, 0.18, 0.50, 0.07, 0.03],
+    'Medium': [0.35, 0.10, 0.35, 0.08, 0.07, 0.05],
+    'Low': [0.25, 0.50, 0.08, 0.01, 0.06, 0.10],
+}
+ACTION_GIVEN_TYPE = {  # Review medication, Increase monitoring, Equipment review, Strict protocols, Training, Chemotherapy, Care practices
+    'Medication Error': [0.55, 0.10, 0.00, 0.10, 0.15, 0.05, 0.05],
+    'Fall': [0.02, 0.45, 0.03, 0.05, 0.15, 0.00, 0.30],
+    'Infection Control': [0.02, 0.15, 0.03, 0.55, 0.15, 0.00, 0.10],
+    'Equipment Failure': [0.00, 0.10, 0.70, 0.05, 0.15, 0.00, 0.00],
+    'Patient Miscommunication': [0.05, 0.05, 0.00, 0.10, 0.55, 0.00, 0.25],
+    'Surgical Error': [0.02, 0.20, 0.08, 0.40, 0.25, 0.00, 0.05],
+    'Procedure Complication': [0.05, 0.35, 0.05, 0.20, 0.10, 0.10, 0.15],
+    'Pressure Ulcer': [0.00, 0.30, 0.00, 0.05, 0.15, 0.00, 0.50],
+}
+PRIORITY_GIVEN_SEVERITY = {  # Priority 1 to 5
+    'High': [0.00, 0.02, 0.08, 0.30, 0.60],
+    'Medium': [0.05, 0.20, 0.45, 0.25, 0.05],
+    'Low': [0.40, 0.35, 0.20, 0.05, 0.00],
+}
+
+class AliasTable:
+    """Walker/Vose alias table: after O(k) setup, each draw from k weighted outcomes is O(1).
+
+    A draw picks a column uniformly, then keeps it with probability prob[column] or takes
+    alias[column] instead. Rows of a 2-D weights array are separate tables (one per
+    conditioning value) and are sampled together with sample_given.
+    """
+
+    def __init__(self, weights):
+        weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        rows, k = weights.shape
+        self.prob = np.ones((rows, k))
+        self.alias = np.tile(np.arange(k), (rows, 1))
+        for row in range(rows):
+            scaled = weights[row] * k / weights[row].sum()
+            small = [i for i in range(k) if scaled[i] < 1.0]
+            large = [i for i in range(k) if scaled[i] >= 1.0]
+            while small and large:
+                less, more = small.pop(), large.pop()
+                self.prob[row, less] = scaled[less]
+                self.alias[row, less] = more
+                scaled[more] -= 1.0 - scaled[less]
+                (small if scaled[more] < 1.0 else large).append(more)
+
+    def sample(self, rng, num_records):
+        return self.sample_given(rng, np.zeros(num_records, dtype=np.intp))
+
+    def sample_given(self, rng, parent_codes):
+        """Draw one outcome per parent code, each from that code's row of weights."""
+        columns = rng.integers(0, self.prob.shape[1], size=len(parent_codes))
+        keep = rng.random(len(parent_codes)) < self.prob[parent_codes, columns]
+        return np.where(keep, columns, self.alias[parent_codes, columns])
+
+# Function to build Zipf weights: the value at rank r gets weight 1 / r**exponent
+def zipf_weights(count, exponent):
+    return 1.0 / np.arange(1, count + 1) ** exponent
+
+# Function to widen a value list to count values ("ICU", ..., "ICU 2", ...) for high-cardinality runs
+def expand_values(values, count):
+    return [values[i % len(values)] + (f" {i // len(values) + 1}" if i >= len(values) else "") for i in range(count)]
+
+class IncidentLoadProfile:
+    """Joint distribution of the categorical incident fields for realistic load tests.
+
+    Department and Incident Type follow a Zipf skew (the first values listed are the hot
+    keys), optionally over more distinct values than the base lists. Severity depends on
+    the incident type, Outcome and Priority on the severity, and Action Taken on the
+    incident type. Widened values ("Fall 3") share their base value's conditional weights.
+    """
+
+    def __init__(self, zipf_exponent=1.1, num_departments=len(departments), num_incident_types=len(incident_types)):
+        self.departments = expand_values(departments, num_departments)
+        self.incident_types = expand_values(incident_types, num_incident_types)
+        self.department_table = AliasTable(zipf_weights(num_departments, zipf_exponent))
+        self.type_table = AliasTable(zipf_weights(num_incident_types, zipf_exponent))
+        self.severity_table = AliasTable([SEVERITY_GIVEN_TYPE[incident_type] for incident_type in incident_types])
+        self.action_table = AliasTable([ACTION_GIVEN_TYPE[incident_type] for incident_type in incident_types])
+        self.outcome_table = AliasTable([OUTCOME_GIVEN_SEVERITY[level] for level in severity])
+        self.priority_table = AliasTable([PRIORITY_GIVEN_SEVERITY[level] for level in severity])
+
+    def sample(self, rng, num_records):
+        """Draw the correlated columns for num_records incidents as a dict of columns."""
+        type_codes = self.type_table.sample(rng, num_records)
+        base_type_codes = type_codes % len(incident_types)
+        severity_codes = self.severity_table.sample_given(rng, base_type_codes)
+        return {
+            'Department': pd.Categorical.from_codes(self.department_table.sample(rng, num_records), categories=self.departments),
+            'Incident Type': pd.Categorical.from_codes(type_codes, categories=self.incident_types),
+            'Severity': pd.Categorical.from_codes(severity_codes, categories=severity),
+            'Outcome': pd.Categorical.from_codes(self.outcome_table.sample_given(rng, severity_codes), categories=outcomes),
+            'Action Taken': pd.Categorical.from_codes(self.action_table.sample_given(rng, base_type_codes), categories=actions),
+            'Priority': (self.priority_table.sample_given(rng, severity_codes) + 1).astype(np.int8),
+        }
+
+# Function to generate random data column by column with NumPy (bulk mode); a profile
+# (IncidentLoadProfile) replaces the uniform, independent categorical draws with its joint distribution
+@traced()
+def generate_incident_frame(num_records, seed=None, allocator=None, as_of=None, profile=None):
+    from faker import Faker
+
+    rng = np.random.default_rng(seed)
+    allocator = allocator or IncidentNumberAllocator(seed=seed if seed is not None else random.randrange(2**32))
+
+    # Descriptions are sampled from a fixed pool of Faker sentences
+    sentence_faker = Faker()
+    sentence_faker.seed_instance(seed)
+    sentences = list(dict.fromkeys(sentence_faker.sentence() for _ in range(SENTENCE_POOL_SIZE)))
+
+    # Dates fall between January 1st and today (or as_of), like fake.date_this_year()
+    today = as_of or datetime.date.today()
+    year_start = np.datetime64(today.replace(month=1, day=1), "D")
+    day_offsets = rng.integers(0, (today - today.replace(month=1, day=1)).days + 1, size=num_records)
+
+    # Columns the profile draws jointly; the rest (or all, without a profile) are uniform and independent
+    sampled = profile.sample(rng, num_records) if profile is not None else {}
+
+    def categorical(column, values):
+        return sampled[column] if column in sampled else random_categorical(rng, values, num_records)
+
+    return pd.DataFrame({
+        'Incident Number': allocator.allocate_many(num_records),
+        'Date': year_start + day_offsets.astype("timedelta64[D]"),
+        'Time': get_time_strings()[rng.integers(0, 86400, size=num_records)],
+        'Department': categorical('Department', departments),
+        'Incident Type': categorical('Incident Type', incident_types),
+        'Description': random_categorical(rng, sentences, num_records),
+        'Severity': categorical('Severity', severity),
+        'Outcome': categorical('Outcome', outcomes),
+        'Responsible Staff': random_categorical(rng, staff, num_records),
+        'Action Taken': categorical('Action Taken', actions),
+        'Priority': sampled['Priority'] if 'Priority' in sampled else rng.integers(1, 6, size=num_records, dtype=np.int8),
+    })
+
+# Function to generate one shard and write it to disk (runs in a worker process)
+def generate_shard(shard_index, num_records, seed, allocator, output_dir, as_of, file_format="csv", profile=None):
+    df = generate_incident_frame(num_records, seed=seed, allocator=allocator, as_of=as_of, profile=profile)
+    path = os.path.join(output_dir, f"incident_data_part{shard_index:04d}.{file_format}")
+    if file_format == "parquet":
+        write_parquet(df, path)
+    else:
+        write_csv(df, path)
+    return path
+
+# Function to split a dataset across a process pool with per-shard seeds and ID ranges
+def generate_sharded(num_records, output_dir, workers=os.cpu_count(), master_seed=0, as_of=None, file_format="csv", profile=None, allocator=None):
+    os.makedirs(output_dir, exist_ok=True)
+    as_of = as_of or datetime.date.today()
+
+    # Same master seed and worker count -> same shard seeds, sizes and ID ranges; shards take
+    # consecutive ID ranges from the allocator, which ends up past all of them
+    shard_seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(master_seed).spawn(workers)]
+    shard_sizes = [num_records // workers + (1 if i < num_records % workers else 0) for i in range(workers)]
+    master_allocator = allocator or IncidentNumberAllocator(seed=master_seed)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                generate_shard, i, shard_sizes[i], shard_seeds[i],
+                master_allocator.take(shard_sizes[i]), output_dir, as_of, file_format, profile,
+            )
+            for i in range(workers)
+        ]
+        return [future.result() for future in futures]
+
+# Headless entry point: python Incident_Dataset_Generator.py --rows 1000000 --workers 8 --output out/
+def cli():
+    parser = argparse.ArgumentParser(description="Generate a synthetic incident dataset in parallel shards.")
+    parser.add_argument("--rows", type=int, required=True, help="Total number of records to generate")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes (and shards)")
+    parser.add_argument("--seed", type=int, default=0, help="Master seed; shard seeds are derived from it")
+    parser.add_argument("--output", default="incident_data", help="Directory the shard files are written to")
+    parser.add_argument("--as-of", type=datetime.date.fromisoformat, default=None,
+                        help="Treat this date (YYYY-MM-DD) as today so reruns produce identical dates")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="Shard file format")
+    parser.add_argument("--profile", choices=["uniform", "realistic"], default="uniform",
+                        help="Draw fields independently and uniformly, or from the skewed, correlated load profile")
+    parser.add_argument("--zipf-exponent", type=float, default=1.1, help="Skew of departments and incident types (realistic profile)")
+    parser.add_argument("--departments", type=int, default=len(departments), help="Distinct departments (realistic profile)")
+    parser.add_argument("--incident-types", type=int, default=len(incident_types), help="Distinct incident types (realistic profile)")
+    parser.add_argument("--allocator-state", default=None,
+                        help="JSON file holding the incident number allocator's position; numbering resumes from it "
+                             "(if it exists) and it is updated after the run, so IDs stay unique across runs; "
+                             "the apps keep theirs in .incident_numbers.json")
+    args = parser.parse_args()
+
+    profile = None
+    if args.profile == "realistic":
+        profile = IncidentLoadProfile(args.zipf_exponent, args.departments, args.incident_types)
+
+    if args.allocator_state and os.path.exists(args.allocator_state):
+        allocator = IncidentNumberAllocator.load(args.allocator_state)
+    else:
+        allocator = IncidentNumberAllocator(seed=args.seed)
+
+    start = time.perf_counter()
+    paths = generate_sharded(args.rows, args.output, args.workers, args.seed, args.as_of, args.format, profile, allocator)
+    elapsed = time.perf_counter() - start
+    if args.allocator_state:
+        allocator.save(args.allocator_state)
+    print(f"Wrote {args.rows} records to {len(paths)} shards in {args.output} "
+          f"in {elapsed:.1f}s ({args.rows / elapsed:,.0f} records/s)")
+
 # Streamlit App
 def main():
     st.title("Incident Data Generator and Viewer")
     
     # Number of records to generate
     st.sidebar.header("Settings")
-    num_records = st.sidebar.number_input("Number of Records to Generate", min_value=1, max_value=10000, value=5000, step=100)
+    bulk_mode = st.sidebar.checkbox("Bulk mode (vectorized)", value=False)
+    max_records = 10_000_000 if bulk_mode else 10000
+    num_records = st.sidebar.number_input("Number of Records to Generate", min_value=1, max_value=max_records, value=5000, step=100)
+    seed = st.sidebar.number_input("Random Seed (bulk mode)", min_value=0, value=42, step=1, disabled=not bulk_mode)
+    realistic = st.sidebar.checkbox("Realistic load profile (skewed, correlated fields)", value=False, disabled=not bulk_mode)
+    zipf_exponent = st.sidebar.slider("Department / Incident Type skew", 0.0, 2.0, 1.1, 0.1, disabled=not (bulk_mode and realistic))
+    load_to_supabase = st.sidebar.checkbox("Load into Supabase (Incident_Dataset)", value=False)
     
     # Generate data
     st.sidebar.write("Click 'Generate Data' to create random incidents.")
     if st.sidebar.button("Generate Data"):
         st.write("### Generated Incident Data")
-        incident_data = generate_incident_data(num_records)
-        df = pd.DataFrame(incident_data)
+        # Incident numbers come from the persistent allocator, so a fixed seed or a restarted
+        # app never reissues the IDs of rows an earlier run loaded
+        allocator = reserve_incident_numbers(int(num_records))
+        if bulk_mode:
+            profile = IncidentLoadProfile(zipf_exponent) if realistic else None
+            df = generate_incident_frame(int(num_records), seed=int(seed), allocator=allocator, profile=profile)
+        else:
+            incident_data = generate_incident_data(num_records, allocator)
+            df = pd.DataFrame(incident_data)
         
-        # Display data in Streamlit
-        st.dataframe(df)
+        # Display data in Streamlit (only the first rows; bulk datasets are too large to send to the browser)
+        if len(df) > PREVIEW_ROWS:
+            st.caption(f"Showing the first {PREVIEW_ROWS:,} of {len(df):,} generated rows.")
+        st.dataframe(df.head(PREVIEW_ROWS))
+
+        # Upsert the generated rows into the table the dashboard reads
+        if load_to_supabase:
+            load_with_progress(df, "Incident_Dataset")
         
-        # Download CSV
-        csv = df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="Download Incident Data as CSV",
-            data=csv,
-            file_name='incident_data.csv',
-            mime='text/csv'
-        )
+        # Download CSV or Parquet (encoded in chunks when clicked)
+        export_download_buttons(df, "Download Incident Data", "incident_data")
         
         # Basic summary statistics
         st.write("### Summary Statistics")
@@ -68,6 +339,9 @@ def main():
         st.write("#### Department-wise Incidents")
         st.bar_chart(df['Department'].value_counts())
 
-# Run the Streamlit app
+# Run the Streamlit app (or the headless generator when started with plain python)
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if st.runtime.exists():
+        main()
+    else:
+        cli()
\ No newline at end of file
@@ -0,0 +1,95 @@
+import json
+import os
+import random
+import threading
+import numpy as np
+
+# Allocator position shared by the generator apps, so IDs stay unique across runs and loads
+ALLOCATOR_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".incident_numbers.json")
+
+# Serializes reservations from concurrent Streamlit sessions in this process
+_state_lock = threading.Lock()
+
+class IncidentNumberAllocator:
+    """Issue unique 8-digit incident numbers in O(1) time and constant memory.
+
+    The n-th number is a seeded Feistel permutation of n over the 8-digit range, so
+    numbers never repeat without remembering the ones already issued. Allocation is
+    resumable from (seed, next_index), and shards get disjoint index ranges.
+    """
+
+    LOW = 10_000_000
+    SIZE = 90_000_000  # 10,000,000 .. 99,999,999
+    HALF_BITS = 14  # 28-bit Feistel domain covers SIZE; larger values are cycle-walked
+    ROUNDS = 4
+
+    def __init__(self, seed=0, start=0, stop=SIZE):
+        self.seed = seed
+        self.next_index = start
+        self.stop = stop
+        self.round_keys = np.random.default_rng(seed).integers(0, 2**32, size=self.ROUNDS, dtype=np.uint64)
+
+    def _feistel(self, values):
+        mask = np.uint64((1 << self.HALF_BITS) - 1)
+        left, right = values >> np.uint64(self.HALF_BITS), values & mask
+        for key in self.round_keys:
+            mixed = (right + key) * np.uint64(0x9E3779B1)
+            mixed ^= mixed >> np.uint64(15)
+            mixed *= np.uint64(0x85EBCA6B)
+            mixed ^= mixed >> np.uint64(13)
+            left, right = right, left ^ (mixed & mask)
+        return (left << np.uint64(self.HALF_BITS)) | right
+
+    def _permute(self, indices):
+        values = self._feistel(indices.astype(np.uint64))
+        out_of_range = values >= self.SIZE
+        while out_of_range.any():
+            values[out_of_range] = self._feistel(values[out_of_range])
+            out_of_range = values >= self.SIZE
+        return values.astype(np.int64) + self.LOW
+
+    def remaining(self):
+        return self.stop - self.next_index
+
+    def allocate_many(self, count):
+        if count > self.remaining():
+            raise ValueError(f"Only {self.remaining()} incident numbers left in this allocator.")
+        indices = np.arange(self.next_index, self.next_index + count, dtype=np.uint64)
+        self.next_index += count
+        return self._permute(indices)
+
+    def take(self, count):
+        """Hand the next count indices to a new allocator (e.g. a shard's) and move past them."""
+        if count > self.remaining():
+            raise ValueError(f"Only {self.remaining()} incident numbers left in this allocator.")
+        taken = IncidentNumberAllocator(self.seed, self.next_index, self.next_index + count)
+        self.next_index += count
+        return taken
+
+    def save(self, path):
+        # Write a sibling file and swap it in, so an interrupted save leaves the old state intact
+        with open(path + ".tmp", "w") as f:
+            json.dump({"seed": self.seed, "next_index": self.next_index, "stop": self.stop}, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            state = json.load(f)
+        return cls(state["seed"], state["next_index"], state["stop"])
+
+def reserve_incident_numbers(count, path=ALLOCATOR_STATE_PATH):
+    """Reserve the next count incident numbers from the persistent allocator at path.
+
+    Returns an allocator holding exactly those numbers. The saved position moves past them
+    before they are used, so a failed load leaves a gap rather than reusing IDs. The state
+    file is created with a random seed on first use.
+    """
+    with _state_lock:
+        if os.path.exists(path):
+            allocator = IncidentNumberAllocator.load(path)
+        else:
+            allocator = IncidentNumberAllocator(seed=random.randrange(2**32))
+        reserved = allocator.take(count)
+        allocator.save(path)
+    return reserved
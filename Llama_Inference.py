@@ -0,0 +1,387 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+import pandas as pd
+import streamlit as st
+
+# Model used by the AI generator apps
+MODEL = "meta-llama/Llama-3.3-70B-Instruct"
+
+# Disk cache for completions, keyed on model, prompt and parameters
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".llm_cache", "completions.sqlite3")
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# Hit/miss counts for this process, shown in the apps' sidebars
+cache_stats = {"hits": 0, "misses": 0}
+
+# Top-up settings: follow-up requests ask only for the missing records
+TOKENS_PER_LINE = 12  # Rough completion tokens per generated line
+MAX_TOKENS_PER_REQUEST = 2000
+MAX_EXCLUDED_TYPES = 200  # Types listed in a follow-up prompt as "do not repeat"
+TOP_UP_LINES_PER_RECORD = 2  # Follow-up rounds may spend the tokens of this many lines per requested record
+TOP_UP_TIME_BUDGET = 60.0  # Seconds of follow-up rounds
+
+# Bare incident type lines: list markers ("1.", "2)", "-", "*") are dropped, and what is left
+# must be a short name of letters (no digits, colons or sentence punctuation)
+LIST_MARKER = r"^(?:[-*\u2022]|\d+[.)])\s+"
+INCIDENT_TYPE_PATTERN = r"[A-Za-z][A-Za-z '&/-]*"
+MAX_INCIDENT_TYPE_WORDS = 4
+
+# Incident pool settings: the pool is refilled in the background when it drops below the low-water mark
+POOL_LOW_WATER = 500
+POOL_REFILL_SIZE = 240  # Incidents asked for per refill round
+POOL_RETRY_DELAY = 60.0  # Seconds before retrying a refill that failed or added nothing; doubled each time
+POOL_MAX_RETRY_DELAY = 3600.0
+
+# Incident lines asked for per request, so each reply stays well under max_tokens
+RECORDS_PER_REQUEST = 60
+
+# Requests allowed in flight at once
+MAX_CONCURRENT_REQUESTS = 8
+
+# Themes rotated across sub-batches so parallel requests return different incident types
+INCIDENT_THEMES = [
+    "medication and pharmacy",
+    "surgery and procedures",
+    "infection prevention",
+    "patient falls and mobility",
+    "diagnostics and imaging",
+    "medical equipment and devices",
+    "communication and documentation",
+    "maternity and pediatrics",
+    "emergency and critical care",
+    "oncology and chemotherapy",
+]
+
+@contextmanager
+def open_cache():
+    """Open (and create if needed) the completion cache database for one transaction."""
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    connection = sqlite3.connect(CACHE_PATH, timeout=30)
+    try:
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, content TEXT, size INTEGER, created REAL, accessed REAL)"
+            )
+            yield connection
+    finally:
+        connection.close()
+
+def cache_key(model, messages, **params):
+    payload = json.dumps({"model": model, "messages": messages, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def cache_get(key):
+    with open_cache() as connection:
+        row = connection.execute("SELECT content, created FROM completions WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > CACHE_TTL_SECONDS:
+            return None
+        connection.execute("UPDATE completions SET accessed = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+def cache_put(key, content):
+    now = time.time()
+    with open_cache() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?)",
+            (key, content, len(content.encode("utf-8")), now, now),
+        )
+        evict_cache(connection, now)
+
+def evict_cache(connection, now):
+    """Drop expired completions, then the least recently used ones until the cache fits CACHE_MAX_BYTES."""
+    connection.execute("DELETE FROM completions WHERE created < ?", (now - CACHE_TTL_SECONDS,))
+    total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+    if total <= CACHE_MAX_BYTES:
+        return
+    for key, size in connection.execute("SELECT key, size FROM completions ORDER BY accessed").fetchall():
+        connection.execute("DELETE FROM completions WHERE key = ?", (key,))
+        total -= size
+        if total <= CACHE_MAX_BYTES:
+            break
+
+def clear_cache():
+    with open_cache() as connection:
+        connection.execute("DELETE FROM completions")
+
+@st.cache_resource
+def get_inference_client():
+    """Create the Hugging Face client on first use, so importing the apps needs neither the key nor huggingface_hub."""
+    from huggingface_hub import InferenceClient
+
+    return InferenceClient(api_key=st.secrets["HF_API_KEY"])
+
+def stream_completion_lines(client, messages, model=MODEL, max_tokens=2000, use_cache=True, usage=None):
+    """Yield each line of the completion as soon as it has fully streamed in.
+
+    Cached completions are replayed line by line; fresh ones are cached once the stream ends.
+    If usage is a dict, its "requests" and "completion_tokens" counts are increased (one
+    streamed chunk is counted as one token; cached replays cost nothing).
+    """
+    key = cache_key(model, messages, max_tokens=max_tokens)
+    if use_cache:
+        content = cache_get(key)
+        if content is not None:
+            cache_stats["hits"] += 1
+            yield from content.strip().split("\n")
+            return
+
+    cache_stats["misses"] += 1
+    if usage is not None:
+        usage["requests"] = usage.get("requests", 0) + 1
+    parts = []
+    pending = ""
+    for chunk in client.chat.completions.create(model=model, messages=messages, max_tokens=max_tokens, stream=True):
+        if not chunk["choices"]:
+            continue
+        text = chunk["choices"][0]["delta"].get("content") or ""
+        if usage is not None and text:
+            usage["completion_tokens"] = usage.get("completion_tokens", 0) + 1
+        parts.append(text)
+        pending += text
+        while "\n" in pending:
+            line, pending = pending.split("\n", 1)
+            yield line
+    if pending:
+        yield pending
+    cache_put(key, "".join(parts))
+
+def top_up_max_tokens(num_lines):
+    """Size max_tokens for a follow-up asking for num_lines lines (the prompts ask for 1.5x)."""
+    return min(MAX_TOKENS_PER_REQUEST, int(num_lines * 1.5 * TOKENS_PER_LINE) + 50)
+
+def exclusion_note(existing_types):
+    """Prompt paragraph telling the model which incident types it already produced."""
+    listed = ", ".join(existing_types[:MAX_EXCLUDED_TYPES])
+    return f"Do not repeat any of these incident types, which already exist: {listed}.\n"
+
+def top_up_token_budget(num_records):
+    """Completion tokens the follow-up rounds of a num_records run may spend."""
+    return TOP_UP_LINES_PER_RECORD * num_records * TOKENS_PER_LINE
+
+def within_top_up_budget(usage, num_records, top_up_started, first_round_tokens):
+    """Whether another follow-up round may run. Only follow-up rounds count: the tokens spent
+    since the first round (first_round_tokens is the count it ended with) and the time since
+    top_up_started, so large runs, whose first round alone is big, can still top up.
+    """
+    follow_up_tokens = usage.get("completion_tokens", 0) - first_round_tokens
+    return (
+        follow_up_tokens < top_up_token_budget(num_records)
+        and time.monotonic() - top_up_started < TOP_UP_TIME_BUDGET
+    )
+
+def parse_incident_line(line):
+    """Parse one "Incident Type: Impact, Likelihood" line into a tuple, or None if it is malformed."""
+    match = re.match(r"^([^\d:]+):\s*(\d),\s*(\d)$", line)
+    if match:
+        incident_type, impact, likelihood = match.groups()
+        incident_type = incident_type.strip()
+        if incident_type and impact.isdigit() and likelihood.isdigit():
+            return (incident_type, int(impact), int(likelihood))
+    return None
+
+def parse_incident_type(line):
+    """Clean up one bare incident type line, or return None if it isn't one (e.g. a preamble)."""
+    incident_type = re.sub(LIST_MARKER, "", line.strip()).strip()
+    if re.fullmatch(INCIDENT_TYPE_PATTERN, incident_type) and len(incident_type.split()) <= MAX_INCIDENT_TYPE_WORDS:
+        return incident_type
+    return None
+
+class LiveTable:
+    """Streamlit table that fills in as rows arrive, redrawn at most every refresh_seconds."""
+
+    def __init__(self, columns, refresh_seconds=0.2):
+        self.placeholder = st.empty()
+        self.columns = columns
+        self.refresh_seconds = refresh_seconds
+        self.rows = []
+        self.last_drawn = 0.0
+
+    def add(self, row):
+        self.rows.append(row)
+        # Draw the first row right away, then throttle so long streams don't redraw per token
+        if len(self.rows) == 1 or time.monotonic() - self.last_drawn >= self.refresh_seconds:
+            self.draw()
+
+    def draw(self):
+        self.placeholder.dataframe(pd.DataFrame(self.rows, columns=self.columns))
+        self.last_drawn = time.monotonic()
+
+    def clear(self):
+        self.placeholder.empty()
+
+class IncidentPool:
+    """Persistent pool of validated, de-duplicated (incident type, impact, likelihood) entries.
+
+    Generation samples from the pool locally. When it holds fewer than low_water entries, a
+    background asyncio task (on the pool's own event loop thread) awaits refill(count, exclude)
+    for more incidents from the model. After a refill fails (last_error is set) or adds nothing,
+    no new one starts for POOL_RETRY_DELAY seconds, doubling with each further failure.
+    """
+
+    def __init__(self, refill, low_water=POOL_LOW_WATER, refill_size=POOL_REFILL_SIZE):
+        self.refill = refill
+        self.low_water = low_water
+        self.refill_size = refill_size
+        self.refill_task = None
+        self.last_error = None
+        self.failed_refills = 0
+        self.retry_at = 0.0
+        self.lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True, name="incident-pool-refill").start()
+        with open_cache() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS incident_pool ("
+                "type_key TEXT PRIMARY KEY, incident_type TEXT, impact INTEGER, likelihood INTEGER, added REAL)"
+            )
+
+    def size(self):
+        with open_cache() as connection:
+            return connection.execute("SELECT COUNT(*) FROM incident_pool").fetchone()[0]
+
+    def types(self):
+        with open_cache() as connection:
+            return [row[0] for row in connection.execute("SELECT incident_type FROM incident_pool ORDER BY added")]
+
+    def add(self, incidents):
+        """Add well-formed incidents, ignoring types already in the pool. Returns how many were new."""
+        rows = [
+            (incident_type.casefold(), incident_type, impact, likelihood, time.time())
+            for incident_type, impact, likelihood in incidents
+            if parse_incident_line(f"{incident_type}: {impact}, {likelihood}") is not None
+        ]
+        with open_cache() as connection:
+            before = connection.total_changes
+            connection.executemany("INSERT OR IGNORE INTO incident_pool VALUES (?, ?, ?, ?, ?)", rows)
+            return connection.total_changes - before
+
+    def sample(self, count):
+        """Return count distinct random incidents, or None if the pool is too small."""
+        with open_cache() as connection:
+            rows = connection.execute(
+                "SELECT incident_type, impact, likelihood FROM incident_pool ORDER BY random() LIMIT ?", (count,)
+            ).fetchall()
+        return rows if len(rows) == count else None
+
+    def is_refilling(self):
+        return self.refill_task is not None and not self.refill_task.done()
+
+    def ensure_refill(self):
+        """Start a background refill if the pool is below its low-water mark and none is running."""
+        with self.lock:
+            if self.is_refilling() or time.monotonic() < self.retry_at or self.size() >= self.low_water:
+                return
+            self.refill_task = asyncio.run_coroutine_threadsafe(self.refill_until_full(), self.loop)
+
+    async def refill_until_full(self):
+        try:
+            while self.size() < self.low_water:
+                incidents = await self.refill(self.refill_size, self.types())
+                if self.add(incidents) == 0:
+                    # The model has stopped producing new incident types
+                    self.back_off()
+                    return
+            self.last_error = None
+            self.failed_refills = 0
+            self.retry_at = 0.0
+        except Exception as e:
+            self.last_error = e
+            self.back_off()
+
+    def back_off(self):
+        self.failed_refills += 1
+        self.retry_at = time.monotonic() + min(POOL_RETRY_DELAY * 2 ** (self.failed_refills - 1), POOL_MAX_RETRY_DELAY)
+
+def build_incident_messages(num_records, batch_index=None, exclude=None):
+    """Build the prompt for num_records incident lines, optionally focused on one sub-batch theme
+    and told which incident types to leave out."""
+    messages = [{
+            "role": "user",
+            "content": f"""Generate unique medically relevant incident types 1.5 times more than the records provided as input {num_records}, ensuring each incident type is unique and concise (limited to 2-3 words). The generated incident types should be directly related to medical scenarios, such as 'Pressure Ulcer', 'Equipment Failure', 'Infection Control', etc.
+                    
+            The output should:
+            1. Contain only unique values with no duplicates.
+            2. It should only contain incident type. No other text should be generated apart from incident type.
+            3. Be formatted with one incident type per line.
+            4. Include only meaningful and realistic medical terms.
+            5. Please don't keep any values null.
+            6. Srictly make sure that you do not add any numbers in the incident type column while generating the response. If it gets generated just remove them and only get the incident type details.
+                    
+            Additionally, for each incident type, assign an Impact score and a Likelihood score.Impact and Likelihood should be integers between 1 and 10, where 1 represents the lowest severity or probability and 6 represents the highest severity or probability.
+            
+            The output should be formatted as follows:
+            Incident Type: Impact, Likelihood
+            
+            Example:
+            Pressure Ulcer: 4, 5
+            Equipment Failure: 5, 3
+            
+            
+            
+            """
+        }]
+    if batch_index is not None:
+        theme = INCIDENT_THEMES[batch_index % len(INCIDENT_THEMES)]
+        messages[0]["content"] += f"Focus this list (batch {batch_index + 1}) on incidents related to {theme}.\n"
+    if exclude:
+        messages[0]["content"] += exclusion_note(exclude)
+    return messages
+
+async def request_incident_batch(num_records, batch_index, semaphore, on_incident, use_cache=True,
+                                 exclude=None, max_tokens=2000, usage=None, inference_client=None):
+    """Stream one sub-batch, passing each incident to on_incident (on the event loop) as soon as its line is complete.
+
+    inference_client replaces the Hugging Face client, e.g. with Fake_Inference.FakeInferenceClient.
+    """
+    loop = asyncio.get_running_loop()
+
+    def consume_stream():
+        for line in stream_completion_lines(
+            inference_client or get_inference_client(),
+            model=MODEL,
+            messages=build_incident_messages(num_records, batch_index, exclude),
+            max_tokens=max_tokens,
+            use_cache=use_cache,
+            usage=usage
+        ):
+            incident = parse_incident_line(line)
+            if incident is not None:
+                loop.call_soon_threadsafe(on_incident, incident)
+
+    async with semaphore:
+        await asyncio.to_thread(consume_stream)
+
+async def refill_incident_pool(count, exclude):
+    """Ask the model for about count fresh incidents that are not in exclude (used by the incident pool).
+
+    Incidents from the sub-batches that succeeded are returned; if none did, the first
+    sub-batch error is raised so the pool records it and backs off.
+    """
+    incidents = []
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    batch_sizes = [min(RECORDS_PER_REQUEST, count - start) for start in range(0, count, RECORDS_PER_REQUEST)]
+    results = await asyncio.gather(
+        *(
+            request_incident_batch(size, index, semaphore, incidents.append, use_cache=False, exclude=exclude or None)
+            for index, size in enumerate(batch_sizes)
+        ),
+        return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors and not incidents:
+        raise errors[0]
+    return incidents
+
+@st.cache_resource
+def get_incident_pool():
+    """Create the incident pool (and its refill event loop) once per server process."""
+    return IncidentPool(refill_incident_pool)
@@ -0,0 +1,92 @@
+# Synthetic records drawn to look like an uploaded template, for the generator apps and the
+# benchmarks. Streamlit is never imported here; numpy and pandas are imported on first use,
+# by which time the caller holding the template DataFrame has loaded them anyway
+from Stage_Spans import traced
+
+def synthesize_column(values, column_schema, num_records, rng):
+    """Draw num_records values like one template column: same dtype, range, value frequencies and share of nulls."""
+    import numpy as np
+    import pandas as pd
+
+    present = values.dropna()
+    if present.empty:
+        return np.full(num_records, None, dtype=object)  # Nothing to imitate
+    nulls = rng.random(num_records) < column_schema["Null Fraction"] if column_schema["Null Fraction"] else None
+    low, high = column_schema["Min"], column_schema["Max"]
+
+    if pd.api.types.is_bool_dtype(values) or not (
+        pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values)
+    ):
+        # Text and flags: sample the template's values with their observed frequencies
+        counts = present.value_counts()
+        codes = rng.choice(len(counts), size=num_records, p=(counts / counts.sum()).to_numpy())
+        if nulls is not None:
+            codes[nulls] = -1
+        return pd.Categorical.from_codes(codes, categories=counts.index, validate=False)
+    if pd.api.types.is_integer_dtype(values) or (pd.api.types.is_float_dtype(values) and (present % 1 == 0).all()):
+        # Whole numbers (read as floats when the column has blanks) stay whole numbers
+        data = rng.integers(int(low), int(high), size=num_records, endpoint=True)
+        return pd.arrays.IntegerArray(data, nulls) if nulls is not None else data
+    if pd.api.types.is_datetime64_any_dtype(values):
+        # Draw in wall-clock time, so time zones and DST don't move midnights or whole hours
+        tz = values.dt.tz
+        if tz is not None:
+            present, low, high = present.dt.tz_localize(None), low.tz_localize(None), high.tz_localize(None)
+        if (present == present.dt.normalize()).all():
+            # Dates without a time of day: draw whole days, so every record stays at midnight
+            first, last = (bound.to_datetime64().astype("datetime64[D]") for bound in (low, high))
+            days = rng.integers(0, (last - first).astype(np.int64), size=num_records, endpoint=True)
+            data = pd.DatetimeIndex(first + days.astype("timedelta64[D]"))
+        else:
+            # Keep the template's resolution: draw multiples of the coarsest unit its times are whole in
+            step = next(
+                (pd.Timedelta(1, unit).value for unit in ("h", "min", "s", "ms", "us") if (present == present.dt.floor(unit)).all()),
+                1,
+            )
+            steps = rng.integers(-(-low.value // step), high.value // step, size=num_records, endpoint=True)
+            data = pd.DatetimeIndex((steps * step).view("datetime64[ns]"))
+        if tz is not None:
+            data = data.tz_localize(tz, ambiguous=False, nonexistent="shift_forward")
+        data = data.as_unit(values.dt.unit)
+        return data.where(~nulls) if nulls is not None else data
+    data = rng.uniform(low, high, size=num_records)
+    if nulls is not None:
+        data[nulls] = np.nan
+    return data
+
+@traced()
+def generate_random_data(df, num_records, schema=None, seed=None, allocator=None):
+    """Generate random data based on the inferred schema, one vectorized NumPy draw per column.
+
+    df is the template (or its sample from infer_schema); schema defaults to describing it.
+    Incident IDs come from allocator (an IncidentNumberAllocator) if given, else run from 1.
+    """
+    import numpy as np
+    import pandas as pd
+    from Schema_Inference import describe_sample
+
+    rng = np.random.default_rng(seed)
+    schema = {entry["Column Name"]: entry for entry in (schema or describe_sample(df))}
+    columns_by_name = {column.strip().lower(): column for column in df.columns}
+
+    random_data = {}
+    for column in df.columns:
+        column_cleaned = column.strip().lower()
+        if column_cleaned == "incident_id":
+            if allocator is not None:
+                random_data[column] = allocator.allocate_many(num_records)
+            else:
+                random_data[column] = np.arange(1, num_records + 1)  # Sequential unique values starting from 1
+        elif column_cleaned in ("likelihood", "impact"):
+            random_data[column] = rng.integers(1, 6, size=num_records, endpoint=True)  # Random integers between 1 and 6
+        else:
+            random_data[column] = synthesize_column(df[column], schema[column], num_records, rng)
+    random_data = pd.DataFrame(random_data, index=pd.RangeIndex(num_records))
+
+    # Add Risk_Score column as product of Impact and Likelihood
+    if "impact" in columns_by_name and "likelihood" in columns_by_name:
+        random_data["Risk Score"] = random_data[columns_by_name["impact"]] * random_data[columns_by_name["likelihood"]]
+    else:
+        random_data["Risk Score"] = None  # Placeholder if columns are not available
+
+    return random_data
@@ -0,0 +1,95 @@
+# Risk score, impact and likelihood categories, shared by the dashboard and the benchmarks.
+# This module imports neither Streamlit nor (until a batch function runs) numpy and pandas,
+# so reaching a scalar helper costs no library imports
+
+# Function to categorize risk based on risk score
+def categorize_risk(score):
+    if score > 17:
+        return "Very High"
+    elif 10 < score <= 17:
+        return "High"
+    elif 5 <= score <= 10:
+        return "Medium"
+    else:
+        return "Low"
+
+# Function to categorize impact
+def categorize_impact(value):
+    if value <= 2:
+        return "Insignificant"
+    elif 3 <= value <=4 :
+        return "Moderate"
+    else:
+        return "Critical"
+
+# Function to categorize likelihood
+def categorize_likelihood(value):
+    if value <= 2:
+        return "Unlikely"
+    elif 3 <= value <= 4:
+        return "Potential"
+    else:
+        return "Likely"
+
+# Bands for batch categorization, written as the scalar functions' branches: (label, low,
+# high, inclusive) in branch order, with inclusive as in Series.between. The first band a
+# score falls in wins; the last band has no bounds and, like the else branch, takes every
+# other score, missing ones included
+RISK_BANDS = [
+    ("Very High", 17, float("inf"), "right"),
+    ("High", 10, 17, "right"),
+    ("Medium", 5, 10, "both"),
+    ("Low", None, None, None),
+]
+IMPACT_BANDS = [
+    ("Insignificant", float("-inf"), 2, "both"),
+    ("Moderate", 3, 4, "both"),
+    ("Critical", None, None, None),
+]
+LIKELIHOOD_BANDS = [
+    ("Unlikely", float("-inf"), 2, "both"),
+    ("Potential", 3, 4, "both"),
+    ("Likely", None, None, None),
+]
+
+# Fixed category order used by the charts
+RISK_ORDER = ["Low", "Medium", "High", "Very High"]
+IMPACT_ORDER = ["Critical", "Moderate", "Insignificant"]
+LIKELIHOOD_ORDER = ["Unlikely", "Potential", "Likely"]
+
+# Function to map a column of scores onto bands in one vectorized pass
+def categorize_values(values, bands, order):
+    import numpy as np
+    import pandas as pd
+
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values.dtype) and not values.hasnans:
+        scores = values.to_numpy()
+    else:
+        # Missing scores become NaN, which no bounded band contains
+        scores = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+    # Start from the catch-all band, then apply the bounded ones last to first so the
+    # earliest matching band wins, as in the scalar if/elif chain
+    *bounded, (fallback, _, _, _) = bands
+    codes = np.full(len(scores), order.index(fallback), dtype=np.int8)
+    for label, low, high, inclusive in reversed(bounded):
+        above = scores >= low if inclusive in ("both", "left") else scores > low
+        below = scores <= high if inclusive in ("both", "right") else scores < high
+        codes[above & below] = order.index(label)
+
+    dtype = pd.CategoricalDtype(order, ordered=True)
+    categories = pd.Categorical.from_codes(codes, dtype=dtype, validate=False)
+    return pd.Series(categories, index=values.index, name=values.name)
+
+# Function to categorize a column of risk scores
+def categorize_risk_scores(scores, bands=RISK_BANDS):
+    return categorize_values(scores, bands, RISK_ORDER)
+
+# Function to categorize a column of impact values
+def categorize_impacts(values, bands=IMPACT_BANDS):
+    return categorize_values(values, bands, IMPACT_ORDER)
+
+# Function to categorize a column of likelihood values
+def categorize_likelihoods(values, bands=LIKELIHOOD_BANDS):
+    return categorize_values(values, bands, LIKELIHOOD_ORDER)
@@ -0,0 +1,69 @@
+import warnings
+import pandas as pd
+
+# Rows read from the top of an uploaded template to infer its schema; memory and time
+# stay bounded by this however large the file is
+SCHEMA_SAMPLE_ROWS = 10_000
+SCHEMA_CHUNK_SIZE = 2_000
+
+# Share of non-null text values that must parse as dates for a column to be treated as dates
+DATE_PARSE_THRESHOLD = 0.95
+
+# Text that looks like a calendar date (2024-01-31, 31/01/2024, ...); times of day alone don't count
+DATE_PATTERN = r"\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}"
+
+def read_sample(file, sample_rows=SCHEMA_SAMPLE_ROWS, chunk_size=SCHEMA_CHUNK_SIZE):
+    """Read the header and at most sample_rows rows of a CSV path or file object, chunk by chunk.
+
+    Chunks are concatenated so dtypes inferred per chunk are promoted consistently
+    (e.g. an int column that turns into floats in a later chunk becomes float).
+    """
+    with pd.read_csv(file, chunksize=chunk_size, nrows=sample_rows) as reader:
+        chunks = list(reader)
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.read_csv(file, nrows=0)
+
+def parse_date_column(values):
+    """Return values parsed as datetimes if nearly all non-null entries are dates, else None."""
+    present = values.dropna()
+    if present.empty or not (pd.api.types.is_string_dtype(present) or pd.api.types.is_object_dtype(present)):
+        return None
+    present = present.astype(str)
+    if present.str.contains(DATE_PATTERN).mean() < DATE_PARSE_THRESHOLD:
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # "Could not infer format" when the first value is ambiguous
+        parsed = pd.to_datetime(values, errors="coerce")
+    if parsed.notna().sum() < DATE_PARSE_THRESHOLD * len(present):
+        return None
+    return parsed
+
+def describe_sample(sample):
+    """Describe each column of a sampled DataFrame: dtype, nullability, distinct values and range."""
+    schema = []
+    for column in sample.columns:
+        values = sample[column]
+        present = values.dropna()
+        is_ranged = pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values)
+        schema.append({
+            "Column Name": column,
+            "Data Type": str(values.dtype),
+            "Nullable": bool(values.isna().any()),
+            "Null Fraction": float(values.isna().mean()) if len(values) else 0.0,
+            "Distinct Values": int(present.nunique()),
+            "Min": present.min() if is_ranged and not present.empty else None,
+            "Max": present.max() if is_ranged and not present.empty else None,
+        })
+    return schema
+
+def infer_schema(file, sample_rows=SCHEMA_SAMPLE_ROWS):
+    """Infer the schema of an uploaded CSV from its header and a bounded sample of rows.
+
+    Returns (schema, sample): describe_sample's description of each column, and the sampled
+    rows (with date columns parsed) for callers that need value frequencies.
+    """
+    sample = read_sample(file, sample_rows)
+    for column in sample.columns:
+        dates = parse_date_column(sample[column])
+        if dates is not None:
+            sample[column] = dates
+    return describe_sample(sample), sample
@@ -0,0 +1,216 @@
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Most recent spans kept in memory for the panel and JSON export (all sessions of this process)
+MAX_SPANS = 1000
+
+# Every finished span is also logged here as one JSON object, for log shippers to pick up
+logger = logging.getLogger("healthdox.spans")
+
+# While any span is open, resident memory is sampled this often (seconds); a spike shorter
+# than this between two samples can be missed
+SAMPLE_INTERVAL = 0.01
+
+span_log = deque(maxlen=MAX_SPANS)
+span_lock = threading.Lock()
+open_spans = threading.local()
+
+# Open spans of every thread, which the sampler raises the peaks of
+sampled_records = []
+spans_open = threading.Event()
+sampler_lock = threading.Lock()
+sampler_thread = None
+
+PAGE_MB = os.sysconf("SC_PAGE_SIZE") / 2**20 if hasattr(os, "sysconf") else 0.0
+
+def resident_mb():
+    """Resident memory of this process in MB, from /proc/self/statm."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_MB
+
+def can_read_resident_memory():
+    try:
+        return resident_mb() > 0
+    except (OSError, ValueError, IndexError):
+        return False
+
+# Peak memory is sampled from /proc, read-only: the process-wide high-water mark
+# (/proc/self/clear_refs) is left alone, since Benchmark_Suite and other sessions rely on it
+TRACK_MEMORY = can_read_resident_memory()
+
+def sample_resident_memory():
+    """Sampler thread: raise the peak of every open span to the current resident memory."""
+    while True:
+        spans_open.wait()
+        try:
+            current = resident_mb()
+        except OSError:
+            current = 0.0
+        with span_lock:
+            for record in sampled_records:
+                record["_peak_rss"] = max(record["_peak_rss"], current)
+        time.sleep(SAMPLE_INTERVAL)
+
+def start_sampler():
+    global sampler_thread
+    with sampler_lock:
+        if sampler_thread is None:
+            sampler_thread = threading.Thread(target=sample_resident_memory, daemon=True, name="span-memory-sampler")
+            sampler_thread.start()
+
+def track_memory(record):
+    """Start sampling memory for a span record; False if memory can't be read."""
+    try:
+        record["_start_rss"] = record["_peak_rss"] = resident_mb()
+    except OSError:
+        return False
+    start_sampler()
+    with span_lock:
+        sampled_records.append(record)
+        spans_open.set()
+    return True
+
+def stop_tracking_memory(record):
+    """Stop sampling a span record and return how far resident memory rose above its start, in MB."""
+    with span_lock:
+        sampled_records.remove(record)
+        if not sampled_records:
+            spans_open.clear()
+    try:
+        peak = max(record.pop("_peak_rss"), resident_mb())
+    except OSError:
+        peak = record["_start_rss"]
+    return peak - record.pop("_start_rss")
+
+def is_frame(value):
+    """Whether value is a DataFrame, without importing pandas (nothing is one until it is loaded)."""
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(value, pandas.DataFrame)
+
+def frame_bytes(value):
+    """Cheap in-memory size of a DataFrame or Series (object contents are not walked)."""
+    return int(value.memory_usage(index=True, deep=False).sum()) if is_frame(value) else int(value.nbytes)
+
+@contextmanager
+def span(stage, **attributes):
+    """Record one stage: its duration, peak memory, and the rows and payload_bytes the body sets.
+
+    Yields the record dict, so the body can fill in record["rows"] and record["payload_bytes"].
+    Spans nest per thread (depth and parent are recorded). Peak memory is how far sampled
+    resident memory rose during the span; it is process-wide, so concurrent sessions can
+    inflate it, and spikes shorter than SAMPLE_INTERVAL can be missed.
+    """
+    stack = getattr(open_spans, "stack", None)
+    if stack is None:
+        stack = open_spans.stack = []
+    record = {
+        "stage": stage,
+        "started_at": time.time(),
+        "depth": len(stack),
+        "parent": stack[-1]["stage"] if stack else None,
+        "rows": None,
+        "payload_bytes": None,
+        **attributes,
+    }
+    tracking = TRACK_MEMORY and track_memory(record)
+    stack.append(record)
+    started = time.perf_counter()
+    try:
+        yield record
+        record["status"] = "ok"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+        raise
+    finally:
+        record["duration_ms"] = (time.perf_counter() - started) * 1000
+        record["peak_mb"] = stop_tracking_memory(record) if tracking else None
+        stack.pop()
+        with span_lock:
+            span_log.append(record)
+        logger.info(json.dumps(record, default=str))
+
+def traced(stage=None):
+    """Decorator recording a span per call, named after the function unless stage is given.
+
+    Rows and payload bytes are taken from the DataFrame (or list, or file) the call returns,
+    or otherwise from its first DataFrame argument (e.g. the cube a chart draws), unless the
+    function set them itself (see add_span_payload).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage or func.__name__) as record:
+                result = func(*args, **kwargs)
+                measured = result
+                if not (is_frame(measured) or isinstance(measured, list)) and not hasattr(measured, "seek"):
+                    measured = next((arg for arg in args if is_frame(arg)), None)
+                rows, payload_bytes = None, None
+                if is_frame(measured):
+                    rows, payload_bytes = len(measured), frame_bytes(measured)
+                elif isinstance(measured, list):
+                    rows = len(measured)
+                elif measured is not None:
+                    payload_bytes = measured.seek(0, os.SEEK_END)
+                    measured.seek(0)
+                if record["rows"] is None:
+                    record["rows"] = rows
+                if record["payload_bytes"] is None:
+                    record["payload_bytes"] = payload_bytes
+                return result
+        return wrapper
+    return decorator
+
+def add_span_payload(num_bytes):
+    """Add num_bytes to the payload of this thread's innermost open span (e.g. a serialized chart)."""
+    stack = getattr(open_spans, "stack", None)
+    if stack:
+        stack[-1]["payload_bytes"] = (stack[-1]["payload_bytes"] or 0) + num_bytes
+
+def recorded_spans():
+    with span_lock:
+        return list(span_log)
+
+def clear_spans():
+    with span_lock:
+        span_log.clear()
+
+def spans_to_json_lines(spans=None):
+    """Encode spans as JSON lines, one object per span."""
+    return "\n".join(json.dumps(record, default=str) for record in (recorded_spans() if spans is None else spans))
+
+def show_span_panel():
+    """Sidebar panel listing the recorded spans, with JSON export and a reset button."""
+    import pandas as pd
+    import streamlit as st
+
+    spans = recorded_spans()
+    st.sidebar.subheader("Stage timings")
+    if st.sidebar.button("Clear timings"):
+        clear_spans()
+        spans = []
+    if not spans:
+        st.sidebar.caption("No stages recorded yet.")
+        return
+
+    table = pd.DataFrame(spans)
+    table["stage"] = ["  " * depth + stage for depth, stage in zip(table["depth"], table["stage"])]
+    table["started"] = pd.to_datetime(table["started_at"], unit="s").dt.strftime("%H:%M:%S")
+    st.sidebar.dataframe(
+        table[["started", "stage", "duration_ms", "rows", "payload_bytes", "peak_mb", "status"]].iloc[::-1],
+        hide_index=True,
+    )
+    st.sidebar.download_button(
+        label="Download timings as JSON",
+        data=spans_to_json_lines(spans),
+        file_name="stage_timings.jsonl",
+        mime="application/x-ndjson",
+        on_click="ignore",
+    )
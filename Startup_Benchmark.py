@@ -0,0 +1,128 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Streamlit-free modules holding the helpers the apps re-export; these should meet the target
+HELPER_MODULES = [
+    "Risk_Categories",
+    "Record_Synthesis",
+    "Stage_Spans",
+]
+
+# App modules whose cold-start import time is measured
+APP_MODULES = [
+    "Categorize_Riskscore",
+    "Incident_Dataset_Generator",
+    "AI_Generated_Dataset",
+    "AI_Record_Generator",
+]
+
+# Libraries that should only be imported on first use, never by importing an app module
+LAZY_LIBRARIES = ["plotly", "supabase", "postgrest", "httpx", "huggingface_hub", "faker", "pyarrow"]
+
+# Imports every app needs at module level; their cost is the floor any app module pays
+BASELINE_IMPORTS = "streamlit, pandas, numpy"
+
+# Cold-start target for importing a module just to reach a helper such as categorize_risk or
+# generate_random_data. The helper modules meet it; the Streamlit scripts import the baseline
+# libraries at module level, so no app module does, and the report says so explicitly
+IMPORT_TARGET_MILLISECONDS = 100
+
+IMPORT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "loaded": sorted({{name.split(".")[0] for name in sys.modules}})}}))
+"""
+
+def measure_import(module, repeats=3, baseline=None):
+    """Import module in fresh interpreters with no Streamlit secrets available and return the timings.
+
+    Each run uses an empty HOME, so st.secrets has nothing to read; a module that reads secrets
+    or creates a client at import time fails here. The best of repeats runs is reported, along
+    with the slowest imports (cumulative microseconds from python -X importtime). Given the
+    result for BASELINE_IMPORTS as baseline, the time over it and the lazy libraries loaded
+    beyond it are reported too.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, PYTHONPATH=directory)
+        for _ in range(repeats):
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT.format(module=module)],
+                cwd=directory, env=env, capture_output=True, text=True,
+            )
+            if result.returncode != 0:
+                return {"module": module, "ok": False, "error": result.stderr.strip().splitlines()[-1]}
+            runs.append((json.loads(result.stdout.strip().splitlines()[-1]), result.stderr))
+
+    stats, importtime = min(runs, key=lambda run: run[0]["seconds"])
+    cumulative = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if "." not in name and name != module:
+            cumulative[name] = int(cumulative_us)
+    slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "module": module,
+        "ok": True,
+        "milliseconds": stats["seconds"] * 1000,
+        "meets_target": stats["seconds"] * 1000 <= IMPORT_TARGET_MILLISECONDS,
+        "over_baseline_milliseconds": stats["seconds"] * 1000 - baseline["milliseconds"] if baseline else None,
+        "loaded": stats["loaded"],
+        "eager_heavy_imports": [
+            name for name in LAZY_LIBRARIES if name in stats["loaded"] and name not in (baseline or {}).get("loaded", [])
+        ],
+        "slowest_imports": {name: microseconds / 1000 for name, microseconds in slowest},
+    }
+
+def cli():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the app modules without secrets.")
+    parser.add_argument("--modules", nargs="+", default=HELPER_MODULES + APP_MODULES, help="Modules to import")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters per module; the fastest is kept")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    baseline = measure_import(BASELINE_IMPORTS, args.repeats)
+    print(f"Baseline ({BASELINE_IMPORTS}): {baseline['milliseconds']:.0f}ms; target {IMPORT_TARGET_MILLISECONDS}ms per module")
+    # Helper modules must not pay for the baseline, so they are measured against nothing
+    results = [
+        measure_import(module, args.repeats, None if module in HELPER_MODULES else baseline)
+        for module in args.modules
+    ]
+    for result in results:
+        if not result["ok"]:
+            print(f"{result['module']}: import failed without secrets: {result['error']}")
+            continue
+        slowest = ", ".join(f"{name} {ms:.0f}ms" for name, ms in result["slowest_imports"].items())
+        eager = ", ".join(result["eager_heavy_imports"]) or "none"
+        over = result["over_baseline_milliseconds"]
+        print(
+            f"{result['module']}: {result['milliseconds']:.0f}ms"
+            + (f", {over:+.0f}ms over baseline" if over is not None else "")
+            + f" (slowest: {slowest}; eager heavy imports: {eager})"
+        )
+    missed = [result["module"] for result in results if result["ok"] and not result["meets_target"]]
+    if missed:
+        print(
+            f"Target of {IMPORT_TARGET_MILLISECONDS}ms NOT met by {len(missed)} of {len(results)} modules "
+            f"({', '.join(missed)})"
+        )
+        if set(missed) - set(APP_MODULES):
+            print(f"Helper modules should import in under {IMPORT_TARGET_MILLISECONDS}ms; check their eager imports")
+        else:
+            print(f"App modules cost at least the {baseline['milliseconds']:.0f}ms baseline; import helpers from the helper modules")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([baseline] + results, f, indent=2)
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,151 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from Stage_Spans import traced
+
+# Loader settings
+BATCH_SIZE = 1000
+MAX_LOAD_WORKERS = 4
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 0.5  # Seconds; doubled on every retry, plus jitter
+
+# HTTP statuses and Postgres/PostgREST error codes worth retrying
+TRANSIENT_ERROR_CODES = {
+    "408", "429", "500", "502", "503", "504",
+    "40001",  # serialization_failure
+    "40P01",  # deadlock_detected
+    "57014",  # query_canceled (statement timeout)
+    "PGRST000", "PGRST001", "PGRST002", "PGRST003",  # PostgREST connection errors
+}
+
+# Generator column (snake_cased) -> table column, per target table
+COLUMN_MAPS = {
+    "Incident_Dataset": {
+        "incident_number": "id",
+        "department": "location",
+        "severity": "severity_level",
+        "responsible_staff": "reporting_staff_role",
+        "action_taken": "followup_actions",
+    },
+    "Risk_Heatmap": {
+        "incident_id": "id",
+    },
+}
+
+# Columns each table accepts
+TABLE_COLUMNS = {
+    "Incident_Dataset": [
+        "id", "date", "time", "location", "incident_type", "description", "severity_level",
+        "likelihood", "outcome", "reporting_staff_role", "followup_actions",
+    ],
+    "Risk_Heatmap": ["id", "incident_type", "impact", "likelihood", "risk_score"],
+}
+
+@st.cache_resource
+def get_supabase_client():
+    """Create one Supabase client on first use and reuse it for every batch and query."""
+    from supabase import create_client
+
+    return create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"])
+
+def to_table_frame(df, table_name):
+    """Rename generator columns to the table's columns and drop the ones it doesn't have."""
+    column_map = COLUMN_MAPS.get(table_name, {})
+
+    def table_column(column):
+        snake_cased = column.strip().lower().replace(" ", "_")
+        return column_map.get(snake_cased, snake_cased)
+
+    renamed = df.rename(columns=table_column)
+    return renamed[[column for column in TABLE_COLUMNS[table_name] if column in renamed.columns]]
+
+def to_records(batch):
+    """Serialize a batch to JSON-ready dicts (ISO dates, NaN as null, plain ints)."""
+    return json.loads(batch.to_json(orient="records", date_format="iso"))
+
+def is_transient_error(error):
+    import httpx
+    from postgrest import APIError
+
+    if isinstance(error, httpx.TransportError):
+        return True
+    return isinstance(error, APIError) and str(error.code) in TRANSIENT_ERROR_CODES
+
+def upsert_batch(client, table_name, records, on_conflict="id"):
+    """Upsert one batch, retrying transient errors with exponential backoff. Returns the retry count."""
+    from postgrest import ReturnMethod
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            client.table(table_name).upsert(
+                records, on_conflict=on_conflict, returning=ReturnMethod.minimal
+            ).execute()
+            return attempt
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_transient_error(e):
+                raise
+            time.sleep(RETRY_BASE_DELAY * 2 ** attempt * (1 + random.random()))
+
+@traced()
+def load_dataframe(df, table_name, batch_size=BATCH_SIZE, max_workers=MAX_LOAD_WORKERS, client=None, on_progress=None):
+    """Upsert a generated DataFrame into a Supabase table in concurrent batches.
+
+    Rows are keyed on the incident ID ("id"), so loading the same data twice is a no-op.
+    Returns a dict with rows, batches, retries, seconds and rows_per_second.
+    """
+    client = client or get_supabase_client()
+    table_frame = to_table_frame(df, table_name)
+    total = len(table_frame)
+
+    start_time = time.perf_counter()
+    loaded = 0
+    retries = 0
+    batches = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Serialize lazily so at most max_workers batches of records are in flight
+        pending = []
+        for start in range(0, total, batch_size):
+            if len(pending) == max_workers:
+                future, rows = pending.pop(0)
+                retries += future.result()
+                loaded += rows
+                if on_progress:
+                    on_progress(loaded, total)
+            batch = table_frame.iloc[start:start + batch_size]
+            pending.append((executor.submit(upsert_batch, client, table_name, to_records(batch)), len(batch)))
+            batches += 1
+        for future, rows in pending:
+            retries += future.result()
+            loaded += rows
+            if on_progress:
+                on_progress(loaded, total)
+    seconds = time.perf_counter() - start_time
+
+    return {
+        "rows": total,
+        "batches": batches,
+        "retries": retries,
+        "seconds": seconds,
+        "rows_per_second": total / seconds if seconds else 0.0,
+    }
+
+def load_with_progress(df, table_name):
+    """Run load_dataframe with a Streamlit progress bar and report the throughput."""
+    progress = st.progress(0.0, text=f"Loading into {table_name}...")
+
+    def on_progress(done, total):
+        progress.progress(done / total if total else 1.0, text=f"Loaded {done:,}/{total:,} rows into {table_name}")
+
+    try:
+        stats = load_dataframe(df, table_name, on_progress=on_progress)
+        st.success(
+            f"Loaded {stats['rows']:,} rows into {table_name} in {stats['seconds']:.1f}s "
+            f"({stats['rows_per_second']:,.0f} rows/s, {stats['retries']} retries)"
+        )
+        return stats
+    except Exception as e:
+        st.error(f"An error occurred while loading into {table_name}: {e}")
+    finally:
+        progress.empty()
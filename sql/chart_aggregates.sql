@@ -0,0 +1,31 @@
+-- Aggregate cubes for the Categorize_Riskscore charts, computed in Postgres.
+--
+-- Each view returns the same rows as build_aggregate_cube() in
+-- Categorize_Riskscore.py, so the charts can roll them up exactly as they do
+-- for the pandas backend. The id column only gives PostgREST range windows a
+-- stable order. Apply after the tables exist (see seed_large_tables.sql for a
+-- local stand-in), then pick "Postgres" as the aggregation backend in the app.
+
+create or replace view "Incident_Dataset_Cube" as
+select
+    row_number() over (order by severity_level, likelihood, incident_type, location) as id,
+    severity_level,
+    likelihood,
+    incident_type,
+    location,
+    count(*) as count
+from "Incident_Dataset"
+group by severity_level, likelihood, incident_type, location;
+
+create or replace view "Risk_Heatmap_Cube" as
+select
+    row_number() over (order by likelihood, impact) as id,
+    likelihood,
+    impact,
+    count(*) as count,
+    sum(risk_score) as risk_score_sum,
+    count(risk_score) as risk_score_count
+from "Risk_Heatmap"
+group by likelihood, impact;
+
+grant select on "Incident_Dataset_Cube", "Risk_Heatmap_Cube" to anon, authenticated;
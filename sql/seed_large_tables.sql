@@ -0,0 +1,87 @@
+-- Local stand-in for the Supabase tables read by Categorize_Riskscore.py.
+-- Run against a local Postgres/PostgREST stack (e.g. `supabase start`) and
+-- point SUPABASE_URL / SUPABASE_KEY in .streamlit/secrets.toml at it.
+--
+-- Row counts can be changed in the generate_series calls below.
+
+create table if not exists "Incident_Dataset" (
+    id bigint generated by default as identity primary key,
+    date date,
+    time time,
+    location text,
+    incident_type text,
+    description text,
+    severity_level text,
+    likelihood smallint,
+    outcome text,
+    reporting_staff_role text,
+    followup_actions text,
+    updated_at timestamptz not null default now()
+);
+
+create table if not exists "Risk_Heatmap" (
+    id bigint generated by default as identity primary key,
+    incident_type text,
+    impact smallint,
+    likelihood smallint,
+    risk_score smallint,
+    updated_at timestamptz not null default now()
+);
+
+-- updated_at is the high-water mark the dashboard refreshes its cached tables from:
+-- inserts take the default and every update (including upserts that hit an existing
+-- id) is restamped by the trigger below. Tables created before the column existed
+-- get it here; their existing rows are stamped with the time of the migration.
+alter table "Incident_Dataset" add column if not exists updated_at timestamptz not null default now();
+alter table "Risk_Heatmap" add column if not exists updated_at timestamptz not null default now();
+
+create or replace function set_updated_at() returns trigger as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$ language plpgsql;
+
+create or replace trigger "Incident_Dataset_updated_at"
+    before update on "Incident_Dataset"
+    for each row execute function set_updated_at();
+create or replace trigger "Risk_Heatmap_updated_at"
+    before update on "Risk_Heatmap"
+    for each row execute function set_updated_at();
+
+-- Delta refreshes filter on the watermark
+create index if not exists "Incident_Dataset_updated_at_idx" on "Incident_Dataset" (updated_at);
+create index if not exists "Risk_Heatmap_updated_at_idx" on "Risk_Heatmap" (updated_at);
+
+insert into "Incident_Dataset" (date, time, location, incident_type, description,
+                                severity_level, likelihood, outcome,
+                                reporting_staff_role, followup_actions)
+select
+    current_date - (random() * 365)::int,
+    make_time((random() * 23)::int, (random() * 59)::int, 0),
+    (array['ICU', 'Surgery Room', 'Emergency Room', 'Pharmacy', 'Radiology',
+           'Pediatrics Ward', 'General Ward', 'Maternity Ward', 'Oncology'])[1 + (random() * 8)::int],
+    (array['Medication Error', 'Fall', 'Infection Control', 'Equipment Failure',
+           'Patient Miscommunication', 'Surgical Error', 'Procedure Complication',
+           'Pressure Ulcer'])[1 + (random() * 7)::int],
+    md5(g::text),
+    (array['High', 'Medium', 'Low'])[1 + (random() * 2)::int],
+    1 + (random() * 5)::int,
+    (array['Patient stable', 'No harm', 'Minor injury', 'Major intervention',
+           'Isolated cases', 'Rescheduled scan'])[1 + (random() * 5)::int],
+    (array['Nurse', 'Surgeon', 'Technician', 'Radiologist', 'Respiratory Therapist',
+           'Pharmacist', 'Physical Therapist', 'Infection Control Nurse'])[1 + (random() * 7)::int],
+    (array['Review medication protocols', 'Increase monitoring', 'Equipment maintenance review',
+           'Implement strict protocols', 'Staff training session'])[1 + (random() * 4)::int]
+from generate_series(1, 500000) as g;
+
+insert into "Risk_Heatmap" (incident_type, impact, likelihood, risk_score)
+select incident_type, impact, likelihood, impact * likelihood
+from (
+    select
+        (array['Medication Error', 'Fall', 'Infection Control', 'Equipment Failure',
+               'Surgical Error', 'Pressure Ulcer'])[1 + (random() * 5)::int] as incident_type,
+        1 + (random() * 5)::int as impact,
+        1 + (random() * 5)::int as likelihood
+    from generate_series(1, 100000)
+) as seeded;
@@ -0,0 +1,12 @@
+import sys
+from pathlib import Path
+from streamlit import config
+from streamlit.logger import set_log_level
+
+# The app modules live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# st.* calls run outside a Streamlit app here; silence the bare-mode warnings (after
+# loading Streamlit's config, which would otherwise reset the level)
+config.get_option("logger.level")
+set_log_level("error")
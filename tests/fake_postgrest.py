@@ -0,0 +1,116 @@
+"""In-process stand-in for the Supabase/PostgREST client, holding tables as lists of rows."""
+
+import datetime
+import threading
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+class FakeQuery:
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table_name = table_name
+        self.columns = None
+        self.count = None
+        self.head = False
+        self.filters = []
+        self.ordering = None
+        self.row_limit = None
+        self.window = None
+        self.upserted = None
+
+    def select(self, columns="*", count=None, head=False):
+        self.columns = None if columns == "*" else columns.split(",")
+        self.count = count
+        self.head = head
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] is not None and row[column] > value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row[column] is not None and row[column] >= value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row[column] is not None and row[column] < value)
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering = (column, desc)
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end)
+        return self
+
+    def upsert(self, records, on_conflict="id", returning=None):
+        self.upserted = (records, on_conflict)
+        return self
+
+    def execute(self):
+        with self.client.lock:
+            self.client.requests.append(self)
+            if self.upserted is not None:
+                return self.client.apply_upsert(self.table_name, *self.upserted)
+        rows = [row for row in self.client.tables[self.table_name] if all(test(row) for test in self.filters)]
+        count = len(rows) if self.count else None
+        if self.head:
+            return FakeResponse([], count)
+        if self.ordering:
+            column, desc = self.ordering
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        if self.window:
+            rows = rows[self.window[0]:self.window[1] + 1]
+        limits = [limit for limit in (self.row_limit, self.client.max_rows) if limit is not None]
+        if limits:
+            rows = rows[:min(limits)]
+        if self.columns:
+            rows = [{column: row.get(column) for column in self.columns} for row in rows]
+        return FakeResponse([dict(row) for row in rows], count)
+
+class FakePostgrest:
+    """Client exposing .table(name) like supabase-py; max_rows mimics PostgREST's response cap.
+
+    Exceptions put in failures are raised, in order, by the next upserts instead of writing.
+    stamp_column, if given, is set to the current time on every upserted row, like a column
+    with a now() default and an update trigger.
+    """
+
+    def __init__(self, tables=None, max_rows=None, failures=(), stamp_column=None):
+        self.tables = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.max_rows = max_rows
+        self.failures = list(failures)
+        self.stamp_column = stamp_column
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def upserts(self):
+        return [request for request in self.requests if request.upserted is not None]
+
+    def apply_upsert(self, table_name, records, on_conflict):
+        if self.failures:
+            raise self.failures.pop(0)
+        rows = self.tables[table_name]
+        positions = {row[on_conflict]: index for index, row in enumerate(rows)}
+        if self.stamp_column:
+            stamp = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="microseconds")
+            records = [{**record, self.stamp_column: stamp} for record in records]
+        for record in records:
+            if record[on_conflict] in positions:
+                rows[positions[record[on_conflict]]] = dict(record)
+            else:
+                positions[record[on_conflict]] = len(rows)
+                rows.append(dict(record))
+        return FakeResponse([])
+
+    def table(self, table_name):
+        self.tables.setdefault(table_name, [])
+        return FakeQuery(self, table_name)
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+import Risk_Categories as categories
+
+CATEGORIZERS = [
+    (categories.categorize_risk_scores, categories.categorize_risk),
+    (categories.categorize_impacts, categories.categorize_impact),
+    (categories.categorize_likelihoods, categories.categorize_likelihood),
+]
+
+def scalar_categories(scalar, values):
+    return [scalar(value) for value in values]
+
+@pytest.mark.parametrize("batch, scalar", CATEGORIZERS)
+def test_batch_matches_scalar_on_integers(batch, scalar):
+    values = pd.Series(np.arange(-2, 40))
+
+    assert batch(values).tolist() == scalar_categories(scalar, values)
+
+@pytest.mark.parametrize("batch, scalar", CATEGORIZERS)
+def test_batch_matches_scalar_on_fractions_and_missing_values(batch, scalar):
+    values = pd.Series(np.concatenate([np.arange(-2, 40, 0.25), [np.nan, np.inf, -np.inf]]))
+
+    assert batch(values).tolist() == scalar_categories(scalar, values)
+
+def test_batch_keeps_index_and_category_order():
+    scores = pd.Series([4, 5, 10, 11, 17, 18], index=list("abcdef"), name="risk_score")
+
+    labels = categories.categorize_risk_scores(scores)
+
+    assert labels.index.equals(scores.index) and labels.name == "risk_score"
+    assert list(labels.cat.categories) == categories.RISK_ORDER
+    assert labels.tolist() == ["Low", "Medium", "Medium", "High", "High", "Very High"]
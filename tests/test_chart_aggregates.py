@@ -0,0 +1,84 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import Categorize_Riskscore as riskscore
+from fake_postgrest import FakePostgrest
+
+def risk_rows(num_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    impact = rng.integers(1, 7, num_rows)
+    likelihood = rng.integers(1, 7, num_rows)
+    return pd.DataFrame({
+        "id": np.arange(1, num_rows + 1),
+        "incident_type": rng.choice(["Fall", "Infection Control", "Medication Error"], num_rows),
+        "impact": impact,
+        "likelihood": likelihood,
+        "risk_score": impact * likelihood,
+        "updated_at": "2024-06-30T00:00:00+00:00",
+    }).to_dict("records")
+
+def cube_view_rows(rows):
+    """What sql/chart_aggregates.sql's Risk_Heatmap_Cube returns for these rows."""
+    cube = (
+        pd.DataFrame(rows)
+        .groupby(["likelihood", "impact"], as_index=False)
+        .agg(count=("id", "size"), risk_score_sum=("risk_score", "sum"), risk_score_count=("risk_score", "count"))
+    )
+    cube.insert(0, "id", np.arange(1, len(cube) + 1))
+    return cube.to_dict("records")
+
+@pytest.fixture
+def use_client(monkeypatch):
+    def install(client):
+        monkeypatch.setattr(riskscore, "get_supabase_client", lambda: client)
+        riskscore.clear_table_cache()
+        return client
+    yield install
+    riskscore.clear_table_cache()
+
+def test_server_cube_is_fetched_in_one_request(use_client):
+    rows = risk_rows(2_000)
+    client = use_client(FakePostgrest({"Risk_Heatmap": rows, "Risk_Heatmap_Cube": cube_view_rows(rows)}))
+
+    cube = riskscore.fetch_server_cube("Risk_Heatmap")
+
+    assert len(cube) == 36
+    assert [request.table_name for request in client.requests] == ["Risk_Heatmap_Cube"]
+
+def test_server_cube_continues_past_max_rows(use_client):
+    rows = risk_rows(2_000)
+    client = use_client(FakePostgrest({"Risk_Heatmap": rows, "Risk_Heatmap_Cube": cube_view_rows(rows)}, max_rows=10))
+
+    cube = riskscore.fetch_server_cube("Risk_Heatmap")
+
+    assert len(cube) == 36
+    assert cube["count"].sum() == len(rows)
+    assert not any(request.head for request in client.requests)  # No separate count query
+
+def test_backends_agree(use_client):
+    rows = risk_rows(5_000)
+    use_client(FakePostgrest({"Risk_Heatmap": rows, "Risk_Heatmap_Cube": cube_view_rows(rows)}, max_rows=1_000))
+
+    riskscore.compare_aggregation_backends("Risk_Heatmap")
+
+def test_backend_mismatch_is_reported(use_client):
+    rows = risk_rows(5_000)
+    view_rows = cube_view_rows(rows)
+    view_rows[0]["count"] += 1
+    use_client(FakePostgrest({"Risk_Heatmap": rows, "Risk_Heatmap_Cube": view_rows}))
+
+    with pytest.raises(AssertionError, match="Risk_Heatmap cube"):
+        riskscore.compare_aggregation_backends("Risk_Heatmap")
+
+# Against a real database: run sql/seed_large_tables.sql and sql/chart_aggregates.sql on a
+# local stack (e.g. `supabase start`) and set LOCAL_SUPABASE_URL and LOCAL_SUPABASE_KEY
+@pytest.mark.skipif(
+    not os.environ.get("LOCAL_SUPABASE_URL"), reason="needs a local Supabase seeded with sql/seed_large_tables.sql"
+)
+@pytest.mark.parametrize("table_name", sorted(riskscore.CUBE_VIEWS))
+def test_backends_agree_on_local_database(use_client, table_name):
+    from supabase import create_client
+
+    use_client(create_client(os.environ["LOCAL_SUPABASE_URL"], os.environ["LOCAL_SUPABASE_KEY"]))
+    riskscore.compare_aggregation_backends(table_name)
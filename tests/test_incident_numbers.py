@@ -0,0 +1,24 @@
+import numpy as np
+from Incident_Numbers import IncidentNumberAllocator, reserve_incident_numbers
+
+def test_reservations_never_repeat_across_runs(tmp_path):
+    path = str(tmp_path / "incident_numbers.json")
+
+    first = reserve_incident_numbers(5_000, path).allocate_many(5_000)
+    # A restarted app reloads the position from the state file
+    second = reserve_incident_numbers(5_000, path).allocate_many(5_000)
+
+    numbers = np.concatenate([first, second])
+    assert len(np.unique(numbers)) == 10_000
+    assert numbers.min() >= IncidentNumberAllocator.LOW
+    assert numbers.max() < IncidentNumberAllocator.LOW + IncidentNumberAllocator.SIZE
+    assert IncidentNumberAllocator.load(path).next_index == 10_000
+
+def test_reserved_numbers_continue_the_saved_sequence(tmp_path):
+    path = str(tmp_path / "incident_numbers.json")
+    IncidentNumberAllocator(seed=7, start=100).save(path)
+
+    reserved = reserve_incident_numbers(50, path).allocate_many(50)
+
+    expected = IncidentNumberAllocator(seed=7, start=100).allocate_many(50)
+    assert reserved.tolist() == expected.tolist()
@@ -0,0 +1,20 @@
+import time
+from Llama_Inference import top_up_token_budget, within_top_up_budget
+
+def test_top_up_budget_scales_with_records():
+    assert top_up_token_budget(3_000) == 10 * top_up_token_budget(300)
+
+def test_large_first_round_leaves_the_top_up_budget_untouched():
+    # A 3,000-record run whose first round alone spent 21,573 tokens
+    usage = {"completion_tokens": 21_573}
+    started = time.monotonic()
+
+    assert within_top_up_budget(usage, 3_000, started, first_round_tokens=21_573)
+
+    usage["completion_tokens"] += top_up_token_budget(3_000)
+    assert not within_top_up_budget(usage, 3_000, started, first_round_tokens=21_573)
+
+def test_top_up_time_is_measured_from_the_top_up_start():
+    usage = {"completion_tokens": 0}
+
+    assert not within_top_up_budget(usage, 100, time.monotonic() - 3_600, first_round_tokens=0)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+from Record_Synthesis import synthesize_column
+from Schema_Inference import describe_sample
+
+def synthesize(values, num_records=5_000):
+    schema = {entry["Column Name"]: entry for entry in describe_sample(values.to_frame())}
+    return pd.Series(synthesize_column(values, schema[values.name], num_records, np.random.default_rng(0)))
+
+@pytest.mark.parametrize("tz", [None, "America/New_York"])
+def test_midnight_dates_stay_whole_days(tz):
+    dates = pd.Series(pd.date_range("2024-01-01", "2024-12-31", freq="7D", tz=tz), name="date")
+
+    data = synthesize(dates)
+
+    assert data.dtype == dates.dtype
+    assert (data == data.dt.normalize()).all()
+    assert data.min() >= dates.min() and data.max() <= dates.max()
+    assert data.dt.normalize().nunique() > 300
+
+def test_timestamps_keep_template_resolution():
+    times = pd.Series(pd.date_range("2024-01-01 08:00", periods=200, freq="37min"), name="reported_at")
+
+    data = synthesize(times)
+
+    assert data.dtype == times.dtype
+    assert (data == data.dt.floor("min")).all() and (data.dt.minute != 0).any()
+    assert data.min() >= times.min() and data.max() <= times.max()
+
+def test_dates_keep_their_null_share():
+    dates = pd.Series(pd.date_range("2024-01-01", periods=100, freq="D"), name="date").where(lambda s: s.index % 4 != 0)
+
+    data = synthesize(dates)
+
+    assert data.isna().mean() == pytest.approx(0.25, abs=0.03)
+    assert (data.dropna() == data.dropna().dt.normalize()).all()
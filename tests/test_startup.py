@@ -0,0 +1,9 @@
+import pytest
+import Startup_Benchmark as startup
+
+@pytest.mark.parametrize("module", startup.HELPER_MODULES)
+def test_helper_modules_import_without_app_libraries(module):
+    result = startup.measure_import(module, repeats=1)
+
+    assert result["ok"], result.get("error")
+    assert not {"streamlit", "pandas", "numpy"} & set(result["loaded"])
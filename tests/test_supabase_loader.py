@@ -0,0 +1,85 @@
+import datetime
+import os
+import pytest
+from postgrest import APIError
+import Supabase_Loader as loader
+from Incident_Dataset_Generator import generate_incident_frame
+from fake_postgrest import FakePostgrest
+
+def incident_frame(num_records, seed=0):
+    return generate_incident_frame(num_records, seed=seed, as_of=datetime.date(2024, 6, 30))
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(loader, "RETRY_BASE_DELAY", 0.0)
+
+def test_rows_are_loaded_in_batches():
+    df = incident_frame(2_500)
+    client = FakePostgrest()
+
+    stats = loader.load_dataframe(df, "Incident_Dataset", batch_size=1_000, client=client)
+
+    assert stats["rows"] == 2_500 and stats["batches"] == 3 and stats["retries"] == 0
+    assert sorted(len(request.upserted[0]) for request in client.upserts()) == [500, 1_000, 1_000]
+    rows = client.tables["Incident_Dataset"]
+    assert sorted(row["id"] for row in rows) == sorted(df["Incident Number"].tolist())
+    assert set(rows[0]) == set(loader.TABLE_COLUMNS["Incident_Dataset"]) - {"likelihood"}
+
+def test_transient_errors_are_retried():
+    df = incident_frame(300)
+    client = FakePostgrest(failures=[
+        APIError({"code": "503", "message": "Service Unavailable"}),
+        APIError({"code": "40001", "message": "could not serialize access"}),
+    ])
+
+    stats = loader.load_dataframe(df, "Incident_Dataset", batch_size=100, max_workers=1, client=client)
+
+    assert stats["retries"] == 2
+    assert len(client.tables["Incident_Dataset"]) == 300
+
+def test_permanent_errors_are_not_retried():
+    df = incident_frame(100)
+    client = FakePostgrest(failures=[APIError({"code": "42501", "message": "permission denied"})])
+
+    with pytest.raises(APIError):
+        loader.load_dataframe(df, "Incident_Dataset", batch_size=100, client=client)
+    assert len(client.upserts()) == 1
+    assert client.tables["Incident_Dataset"] == []
+
+def test_retries_give_up_after_max_retries():
+    df = incident_frame(100)
+    client = FakePostgrest(failures=[APIError({"code": "503", "message": "down"})] * (loader.MAX_RETRIES + 1))
+
+    with pytest.raises(APIError):
+        loader.load_dataframe(df, "Incident_Dataset", batch_size=100, client=client)
+    assert len(client.upserts()) == loader.MAX_RETRIES + 1
+
+def test_reloading_is_idempotent():
+    df = incident_frame(1_500)
+    client = FakePostgrest()
+
+    loader.load_dataframe(df, "Incident_Dataset", batch_size=500, client=client)
+    first_load = [dict(row) for row in client.tables["Incident_Dataset"]]
+    loader.load_dataframe(df, "Incident_Dataset", batch_size=500, client=client)
+
+    assert client.tables["Incident_Dataset"] == first_load
+
+# Against a real database: run sql/seed_large_tables.sql on a local stack (e.g. `supabase start`)
+# and set LOCAL_SUPABASE_URL and LOCAL_SUPABASE_KEY. Writes 2,000 generated rows to Incident_Dataset.
+@pytest.mark.skipif(
+    not os.environ.get("LOCAL_SUPABASE_URL"), reason="needs a local Supabase seeded with sql/seed_large_tables.sql"
+)
+def test_reloading_is_idempotent_on_local_database():
+    from postgrest import CountMethod
+    from supabase import create_client
+
+    client = create_client(os.environ["LOCAL_SUPABASE_URL"], os.environ["LOCAL_SUPABASE_KEY"])
+    df = incident_frame(2_000, seed=12)
+
+    def row_count():
+        return client.table("Incident_Dataset").select("id", count=CountMethod.exact, head=True).execute().count
+
+    loader.load_dataframe(df, "Incident_Dataset", client=client)
+    after_first_load = row_count()
+    loader.load_dataframe(df, "Incident_Dataset", client=client)
+    assert row_count() == after_first_load
@@ -0,0 +1,78 @@
+import datetime
+import numpy as np
+import pytest
+import Categorize_Riskscore as riskscore
+import Supabase_Loader as loader
+from Incident_Dataset_Generator import generate_incident_frame
+from fake_postgrest import FakePostgrest
+
+def incident_rows(ids):
+    return [{"id": int(key), "location": "Ward A", "likelihood": 3} for key in ids]
+
+def skewed_ids():
+    """A dense identity block 1..20,000 plus 500 sparse 8-digit loader ids."""
+    loader_ids = np.random.default_rng(0).choice(np.arange(10_000_000, 100_000_000), 500, replace=False)
+    return np.concatenate([np.arange(1, 20_001), loader_ids])
+
+def load_incidents(client, num_records, seed, **columns):
+    df = generate_incident_frame(num_records, seed=seed, as_of=datetime.date(2024, 6, 30)).assign(**columns)
+    loader.load_dataframe(df, "Incident_Dataset", client=client)
+    return df
+
+@pytest.fixture
+def use_client(monkeypatch):
+    def install(client):
+        monkeypatch.setattr(riskscore, "get_supabase_client", lambda: client)
+        riskscore.clear_table_cache()
+        return client
+    yield install
+    riskscore.clear_table_cache()
+
+def test_windows_split_skewed_keys_evenly(use_client):
+    ids = skewed_ids()
+    use_client(FakePostgrest({"Incident_Dataset": incident_rows(ids)}))
+
+    edges = riskscore.key_quantiles("Incident_Dataset", len(ids), 16)
+
+    window_rows = np.diff(np.searchsorted(np.sort(ids), edges + [ids.max() + 1]))
+    assert len(window_rows) == 16
+    assert window_rows.max() - window_rows.min() <= 1
+
+def test_paged_fetch_reads_every_row_under_max_rows(use_client):
+    ids = skewed_ids()
+    use_client(FakePostgrest({"Incident_Dataset": incident_rows(ids)}, max_rows=700))
+
+    data = riskscore.fetch_paged("Incident_Dataset")
+
+    assert sorted(data["id"]) == sorted(ids.tolist())
+
+def test_refresh_picks_up_loaded_rows(use_client):
+    client = use_client(FakePostgrest(stamp_column="updated_at"))
+    load_incidents(client, 5_000, seed=0)
+    assert len(riskscore.fetch_data("Incident_Dataset")) == 5_000
+
+    load_incidents(client, 5_000, seed=1)
+    data = riskscore.fetch_data("Incident_Dataset")
+
+    assert sorted(data["id"]) == sorted(row["id"] for row in client.tables["Incident_Dataset"])
+
+def test_refresh_picks_up_upserted_rows(use_client):
+    client = use_client(FakePostgrest(stamp_column="updated_at"))
+    df = load_incidents(client, 2_000, seed=0, Severity="Low")
+    riskscore.fetch_data("Incident_Dataset")
+
+    load_incidents(client, 500, seed=0, Severity="High")
+    data = riskscore.fetch_data("Incident_Dataset")
+
+    assert len(data) == len(df)
+    assert (data["severity_level"] == "High").sum() == 500
+
+def test_refresh_reloads_after_deletes(use_client):
+    client = use_client(FakePostgrest(stamp_column="updated_at"))
+    load_incidents(client, 2_000, seed=0)
+    riskscore.fetch_data("Incident_Dataset")
+
+    del client.tables["Incident_Dataset"][:300]
+    data = riskscore.fetch_data("Incident_Dataset")
+
+    assert sorted(data["id"]) == sorted(row["id"] for row in client.tables["Incident_Dataset"])